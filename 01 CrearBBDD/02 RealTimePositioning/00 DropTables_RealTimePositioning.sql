@@ -1,4 +1,10 @@
 
+-- Tabla: UserLatestPosition
+DROP TABLE IF EXISTS tfm_ips.UserLatestPosition;
+
+-- Tabla: UserLatestPositionDeletion
+DROP TABLE IF EXISTS tfm_ips.UserLatestPositionDeletion;
+
 -- Tabla: UserPosition
 DROP TABLE IF EXISTS tfm_ips.UserPosition;
 
@@ -8,4 +14,8 @@ DROP TABLE IF EXISTS tfm_ips.UserWifi;
 -- Tabla: User
 DROP TABLE IF EXISTS tfm_ips.User;
 
+-- Función del trigger de UserLatestPosition
+DROP FUNCTION IF EXISTS tfm_ips.update_user_latest_position();
+DROP FUNCTION IF EXISTS tfm_ips.update_user_latest_position_deletion();
+
 commit;
\ No newline at end of file
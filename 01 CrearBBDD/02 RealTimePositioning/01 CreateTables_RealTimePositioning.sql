@@ -7,41 +7,152 @@ CREATE TABLE IF NOT EXISTS tfm_ips.User (
     DeviceName TEXT NOT NULL
 );
 
+-- Las tablas de histórico UserWifi y UserPosition se particionan por día (UTC) según SystemTimestamp.
+-- El backend crea las particiones de los próximos días y, si se configura una retención
+-- (partitioning.retention_days > 0), borra las que la superan (PartitionService).
+-- La clave primaria incluye SystemTimestamp porque es la clave de partición.
+
 -- Tabla: UserWifi
 CREATE TABLE IF NOT EXISTS tfm_ips.UserWifi (
-    Id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    Id INTEGER GENERATED ALWAYS AS IDENTITY,
     UserId INTEGER NOT NULL,
     SystemTimestamp Timestamptz NOT NULL,
     MAC_BSSID TEXT NOT NULL,
     RSS INTEGER NOT NULL,
+    PRIMARY KEY (Id, SystemTimestamp),
     CONSTRAINT fk_UserWifi_User
         FOREIGN KEY (UserId)
         REFERENCES tfm_ips.User (Id)
         ON DELETE CASCADE
-);
+) PARTITION BY RANGE (SystemTimestamp);
 
 -- Tabla: UserPosition
 CREATE TABLE IF NOT EXISTS tfm_ips.UserPosition (
-    Id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    Id INTEGER GENERATED ALWAYS AS IDENTITY,
     UserId INTEGER NOT NULL,
     SystemTimestamp Timestamptz NOT NULL,
     Latitude DOUBLE PRECISION NOT NULL,
     Longitude DOUBLE PRECISION NOT NULL,
     FloorId INTEGER NOT NULL,
+    PRIMARY KEY (Id, SystemTimestamp),
     CONSTRAINT fk_UserPosition_User
         FOREIGN KEY (UserId)
         REFERENCES tfm_ips.User (Id)
         ON DELETE CASCADE
+) PARTITION BY RANGE (SystemTimestamp);
+
+-- Particiones por defecto: reciben las filas de los días que no tienen partición (particionado desactivado
+-- o mantenimiento fallido) para que las inserciones no fallen. PartitionService mueve esas filas a su
+-- partición diaria al crearla.
+CREATE TABLE IF NOT EXISTS tfm_ips.UserWifi_Default PARTITION OF tfm_ips.UserWifi DEFAULT;
+
+CREATE TABLE IF NOT EXISTS tfm_ips.UserPosition_Default PARTITION OF tfm_ips.UserPosition DEFAULT;
+
+-- Tabla: UserLatestPosition
+-- Última posición de cada persona, para no recorrer todo el histórico de UserPosition en cada consulta
+CREATE TABLE IF NOT EXISTS tfm_ips.UserLatestPosition (
+    UserId INTEGER PRIMARY KEY,
+    PositionId INTEGER NOT NULL,
+    SystemTimestamp Timestamptz NOT NULL,
+    Latitude DOUBLE PRECISION NOT NULL,
+    Longitude DOUBLE PRECISION NOT NULL,
+    FloorId INTEGER NOT NULL,
+    -- Transacción que escribió la fila: cursor de las consultas incrementales ("cambios desde")
+    TxId xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    CONSTRAINT fk_UserLatestPosition_User
+        FOREIGN KEY (UserId)
+        REFERENCES tfm_ips.User (Id)
+        ON DELETE CASCADE
+);
+
+-- Mantiene UserLatestPosition con cada inserción en UserPosition (INSERT o COPY).
+-- Se ejecuta una vez por sentencia con las filas nuevas y solo sustituye posiciones más antiguas.
+CREATE OR REPLACE FUNCTION tfm_ips.update_user_latest_position()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tfm_ips.UserLatestPosition (UserId, PositionId, SystemTimestamp, Latitude, Longitude, FloorId)
+    SELECT DISTINCT ON (UserId) UserId, Id, SystemTimestamp, Latitude, Longitude, FloorId
+    FROM new_positions
+    ORDER BY UserId, SystemTimestamp DESC, Id DESC
+    ON CONFLICT (UserId) DO UPDATE SET
+        PositionId = EXCLUDED.PositionId,
+        SystemTimestamp = EXCLUDED.SystemTimestamp,
+        Latitude = EXCLUDED.Latitude,
+        Longitude = EXCLUDED.Longitude,
+        FloorId = EXCLUDED.FloorId,
+        TxId = pg_current_xact_id()
+    WHERE tfm_ips.UserLatestPosition.SystemTimestamp <= EXCLUDED.SystemTimestamp;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_up_latest_position ON tfm_ips.UserPosition;
+CREATE TRIGGER trg_up_latest_position
+    AFTER INSERT ON tfm_ips.UserPosition
+    REFERENCING NEW TABLE AS new_positions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tfm_ips.update_user_latest_position();
+
+-- Tabla: UserLatestPositionDeletion
+-- Una única fila con la última transacción que ha borrado filas de UserLatestPosition (clear-user-positions
+-- o personas borradas). Las consultas incrementales no ven los borrados: si hay uno desde el cursor del
+-- cliente, el backend le devuelve la foto completa (reset).
+CREATE TABLE IF NOT EXISTS tfm_ips.UserLatestPositionDeletion (
+    Id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (Id),
+    TxId xid8 NOT NULL DEFAULT '0'
 );
 
+INSERT INTO tfm_ips.UserLatestPositionDeletion (Id) VALUES (TRUE) ON CONFLICT (Id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION tfm_ips.update_user_latest_position_deletion()
+RETURNS trigger AS $$
+BEGIN
+    -- TRUNCATE no tiene tabla de transición: la condición de DELETE va en su propia rama para que
+    -- no se evalúe (ni se prepare) en el trigger de TRUNCATE. Un DELETE solo cuenta si ha borrado alguna fila
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE tfm_ips.UserLatestPositionDeletion SET TxId = pg_current_xact_id();
+    ELSIF EXISTS (SELECT 1 FROM deleted_positions) THEN
+        UPDATE tfm_ips.UserLatestPositionDeletion SET TxId = pg_current_xact_id();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_ulp_deletion ON tfm_ips.UserLatestPosition;
+CREATE TRIGGER trg_ulp_deletion
+    AFTER DELETE ON tfm_ips.UserLatestPosition
+    REFERENCING OLD TABLE AS deleted_positions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tfm_ips.update_user_latest_position_deletion();
+
+DROP TRIGGER IF EXISTS trg_ulp_truncate ON tfm_ips.UserLatestPosition;
+CREATE TRIGGER trg_ulp_truncate
+    AFTER TRUNCATE ON tfm_ips.UserLatestPosition
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION tfm_ips.update_user_latest_position_deletion();
+
+-- Carga inicial desde el histórico existente
+INSERT INTO tfm_ips.UserLatestPosition (UserId, PositionId, SystemTimestamp, Latitude, Longitude, FloorId)
+SELECT DISTINCT ON (UserId) UserId, Id, SystemTimestamp, Latitude, Longitude, FloorId
+FROM tfm_ips.UserPosition
+ORDER BY UserId, SystemTimestamp DESC, Id DESC
+ON CONFLICT (UserId) DO NOTHING;
+
 -- Crear índices
-CREATE INDEX IF NOT EXISTS idx_uw_userid
-    ON tfm_ips.UserWifi (UserId);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_u_devicename
+    ON tfm_ips.User (DeviceName);
+
+-- Índices compuestos (se crean también en cada partición): lecturas recientes por persona
+CREATE INDEX IF NOT EXISTS idx_uw_userid_systemtimestamp
+    ON tfm_ips.UserWifi (UserId, SystemTimestamp DESC);
 
-CREATE INDEX IF NOT EXISTS idx_up_userid
-    ON tfm_ips.UserPosition (UserId);
+CREATE INDEX IF NOT EXISTS idx_up_userid_systemtimestamp
+    ON tfm_ips.UserPosition (UserId, SystemTimestamp DESC);
 	
 CREATE INDEX IF NOT EXISTS idx_rpp_systemptimestamp
     ON tfm_ips.UserPosition (SystemTimestamp);
 
+CREATE INDEX IF NOT EXISTS idx_ulp_txid
+    ON tfm_ips.UserLatestPosition (TxId);
+
 commit;
\ No newline at end of file
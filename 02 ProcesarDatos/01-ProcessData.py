@@ -1,5 +1,11 @@
 import os
+import time
 import logging
+import array
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from manifest import PROCESSED_SECTION, manifestKey, loadManifest, saveManifest, fileSignature, sameContent
 
 # Carpetas de origen y destino de los datos
 SOURCE_FOLDER = 'RawData'
@@ -16,6 +22,42 @@ GROUND_TRUTH_PREFIX = 'GT_'
 POSI_STR = 'POSI'
 WIFI_STR = 'WIFI'
 
+# Número máximo de líneas POSI estimadas que se agrupan en cada bloque de texto
+ESTIMATED_POSI_CHUNK_LINES = 100000
+
+# Parte decimal de los timestamps en milisegundos ('.0', '.001', ..., '.999').
+# str(segundos) + MS_DECIMALS[milisegundos] es igual a str(ms / 1000) sin formatear un float por línea
+MS_DECIMALS = [str(ms / 1000)[1:] for ms in range(1000)]
+
+# Formatos de salida: texto separado por ';' (POSI.txt, WIFI.txt), columnas tipadas de NumPy (POSI.npz, WIFI.npz) o ambos
+OUTPUT_TEXT = 'text'
+OUTPUT_NPZ = 'npz'
+OUTPUT_BOTH = 'both'
+NPZ_EXT = '.npz'
+
+# Timestamp con 3 decimales a milisegundos enteros (exacto, como NUMERIC(8,3) en la base de datos)
+def timestampToMs(timestamp):
+    return int(round(float(timestamp) * 1000))
+
+# Columnas de los ficheros .npz: nombre, conversión del campo de texto y tipo NumPy.
+# El orden es el de los campos de las líneas POSI/WIFI (sin el primero)
+POSI_COLUMNS = [
+    ('apptimestamp_ms', timestampToMs, np.int64),
+    ('counter', int, np.int32),
+    ('latitude', float, np.float64),
+    ('longitude', float, np.float64),
+    ('floorid', int, np.int32),
+    ('buildingid', int, np.int32)
+]
+WIFI_COLUMNS = [
+    ('apptimestamp_ms', timestampToMs, np.int64),
+    ('sensortimestamp_ms', timestampToMs, np.int64),
+    ('name_ssid', str, np.str_),
+    ('mac_bssid', str, np.str_),
+    ('frequency', int, np.int32),
+    ('rss', int, np.int32)
+]
+
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
@@ -52,39 +94,111 @@ def processGroundTruthPosiLine(line):
     ]
     return ';'.join(finalFields) + '\n'
 
-# Obtiene las líneas POSI y WIFI de los ficheros
-def getPosiAndWifiLines(file_path):   
-    posi_lines = []
-    wifi_lines = []
-    
+# Genera las líneas POSI del fichero y escribe las WIFI en wifi_writer según se leen,
+# sin cargar el fichero en memoria
+def readPosiAndWifiLines(file_path, wifi_writer):
     # Leer el archivo original y filtrar líneas
     try:
         with open(file_path, 'r', encoding='utf-8') as src:
             for line in src:
                 if line.startswith(POSI_STR):
-                    posi_lines.append(processPosiLine(line))
+                    yield processPosiLine(line)
                 elif line.startswith(WIFI_STR):
-                    wifi_lines.append(processWifiLine(line))
+                    wifi_writer.write(processWifiLine(line))
     except Exception as e:
-        logging.error(f"Error reading '{source_path}': {e}")
-    
-    return posi_lines, wifi_lines
+        logging.error(f"Error reading '{file_path}': {e}")
+        raise
 
-# Obtiene las líneas POSI del fichero Ground Truth
-def getPosiFromGroundTruth(file_path):   
-    posi_lines = []
-    
-    # Leer el archivo original y filtrar líneas
+# Genera las líneas POSI del fichero Ground Truth
+def readPosiFromGroundTruth(file_path):
+    # Leer el archivo original y convertir las líneas
     try:
         with open(file_path, 'r', encoding='utf-8') as src:
             for line in src:
-                posi_lines.append(processGroundTruthPosiLine(line))
+                yield processGroundTruthPosiLine(line)
     except Exception as e:
-        logging.error(f"Error reading '{source_path}': {e}")
-    
-    return posi_lines
+        logging.error(f"Error reading '{file_path}': {e}")
+        raise
+
+# Fichero de salida que se abre (creando su carpeta) la primera vez que se escribe en él,
+# para crear solo los ficheros y carpetas con contenido
+class LazyFileWriter:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = None
+
+    def write(self, text):
+        if self.file is None:
+            folder = os.path.dirname(self.file_path)
+            if not os.path.isdir(folder):
+                os.makedirs(folder, exist_ok=True)
+                logging.info(f"'{folder}' directory created")
+            self.file = open(self.file_path, 'w', encoding='utf-8')
+        self.file.write(text)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            logging.info(f"Written '{self.file_path}'")
+
+# Fichero .npz con una columna tipada por campo. Recibe las mismas líneas (o bloques de líneas) que LazyFileWriter
+# y las guarda al cerrar, solo si tiene contenido. Las columnas numéricas se acumulan en array.array
+# (8 bytes por valor como máximo) en lugar de listas de objetos de Python
+class NpzFileWriter:
+    def __init__(self, file_path, columns):
+        self.file_path = file_path
+        self.columns = columns
+        self.values = self.emptyValues()
 
-# Escribe el contenido en un fichero
+    def emptyValues(self):
+        return [[] if dtype is np.str_ else array.array(np.dtype(dtype).char) for _, _, dtype in self.columns]
+
+    def write(self, text):
+        for line in text.splitlines():
+            fields = line.split(';')
+            for values, (_, convert, _), field in zip(self.values, self.columns, fields[1:]):
+                values.append(convert(field))
+
+    def close(self):
+        if self.values[0]:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            np.savez(self.file_path, **{
+                name: np.asarray(values, dtype=dtype)
+                for values, (name, _, dtype) in zip(self.values, self.columns)
+            })
+            logging.info(f"Written '{self.file_path}'")
+        self.values = self.emptyValues()
+
+# Escribe en varios ficheros de salida a la vez
+class MultiFileWriter:
+    def __init__(self, writers):
+        self.writers = writers
+
+    def write(self, text):
+        for writer in self.writers:
+            writer.write(text)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+# Crea el writer de un tipo de datos (POSI o WIFI) según el formato de salida
+def createWriter(final_folder, name, ext, columns, output_format):
+    writers = []
+    if output_format != OUTPUT_NPZ:
+        writers.append(LazyFileWriter(os.path.join(final_folder, f'{name}{ext}')))
+    if output_format != OUTPUT_TEXT:
+        writers.append(NpzFileWriter(os.path.join(final_folder, f'{name}{NPZ_EXT}'), columns))
+    return MultiFileWriter(writers)
+
+# Escribe las líneas en writer y las vuelve a generar para el siguiente paso del proceso
+def writeLines(writer, lines):
+    for line in lines:
+        writer.write(line)
+        yield line
+
+# Escribe el contenido en un fichero (content puede ser una lista o un generador de líneas)
 def writeToFile(file_path, content):
     try:
         with open(file_path, 'w', encoding='utf-8') as out:
@@ -92,6 +206,7 @@ def writeToFile(file_path, content):
         logging.info(f"Written '{file_path}'")
     except Exception as e:
         logging.error(f"Error writing '{file_path}': {e}")
+        raise
 
 # Devuelve la línea POSI en una tupla
 def parsePosiLine(posi_line):
@@ -104,7 +219,9 @@ def parsePosiLine(posi_line):
     building = fields[6]
     return (timestamp,counter,lat,lon,floor,building)
 
-def estimatePositionsBetweenTwoPoints(estimated_posis,posi_line_1, posi_line_2):
+# Genera las posiciones interpoladas cada milisegundo entre dos puntos,
+# en bloques de texto de hasta ESTIMATED_POSI_CHUNK_LINES líneas
+def estimatePositionsBetweenTwoPoints(posi_line_1, posi_line_2):
     
     # Crear interpolaciones lineales cada milisegundo
     # P(t) = P1 + ((t)/delta_t) * (P2 - P1)
@@ -120,34 +237,50 @@ def estimatePositionsBetweenTwoPoints(estimated_posis,posi_line_1, posi_line_2):
     end_ms = int(t2 * 1000)
     delta_t = end_ms - start_ms
     
-    for ms in range(start_ms + 1, end_ms):
-        t = ms - start_ms
-        lat = lat1 + (t / delta_t) * (lat2 - lat1)
-        lon = lon1 + (t / delta_t) * (lon2 - lon1)
+    line_format = f"{POSI_STR};{{}}{{}};-1;{{}};{{}};{posi_line_1[4]};{posi_line_1[5]}\n"
+    
+    # Cada bloque se calcula con NumPy en el mismo orden de operaciones que con floats de Python,
+    # por lo que los valores (y el texto generado) son idénticos. La memoria no depende de la duración del tramo
+    for chunk_start_ms in range(start_ms + 1, end_ms, ESTIMATED_POSI_CHUNK_LINES):
+        ms = np.arange(chunk_start_ms, min(chunk_start_ms + ESTIMATED_POSI_CHUNK_LINES, end_ms), dtype=np.int64)
+        t = (ms - start_ms) / delta_t
+        lats = lat1 + t * (lat2 - lat1)
+        lons = lon1 + t * (lon2 - lon1)
+        seconds, millis = np.divmod(ms, 1000)
         
-        estimated_posis.append(f"POSI;{ms/1000};-1;{lat};{lon};{posi_line_1[4]};{posi_line_1[5]}\n")
+        yield "".join(map(
+            line_format.format,
+            seconds.tolist(),
+            map(MS_DECIMALS.__getitem__, millis.tolist()),
+            lats.tolist(),
+            lons.tolist()
+        ))
     
 
-# Estima las posiciones con una interpolación lineal
+# Estima las posiciones con una interpolación lineal.
+# Genera los POSI originales y los estimados según se leen las líneas, sin guardarlas en memoria
 def estimatePositions(posi_lines):
     
     logging.info("Estimating positions")
     
-    estimated_posis = []
+    previous_line = None
+    previous_posi = None
     
-    for i in range(len(posi_lines) - 1):
-        posi_line_1 = parsePosiLine(posi_lines[i])
-        posi_line_2 = parsePosiLine(posi_lines[i + 1])
+    for posi_line in posi_lines:
+        posi = parsePosiLine(posi_line)
         
-        # Añadir el primer POSI
-        estimated_posis.append(posi_lines[i])
+        if previous_line is not None:
+            # Añadir el primer POSI
+            yield previous_line
+            
+            yield from estimatePositionsBetweenTwoPoints(previous_posi,posi)
         
-        estimatePositionsBetweenTwoPoints(estimated_posis,posi_line_1,posi_line_2)
+        previous_line = posi_line
+        previous_posi = posi
     
     # Añadir el útimo POSI
-    estimated_posis.append(posi_lines[len(posi_lines) - 1])
-    
-    return estimated_posis
+    if previous_line is not None:
+        yield previous_line
 
 # Estima las posiciones con una interpolación lineal, pero descartando las transiciones entre plantas
 # TODO Descartar las transiciones entre plantas
@@ -155,29 +288,31 @@ def estimatePositionsWithoutTransitions(posi_lines):
     
     logging.info("Estimating positions")
     
-    estimated_posis = []
-    last_add_index = -1;
+    previous_line = None
+    previous_posi = None
+    last_add_index = -1
     
-    for i in range(len(posi_lines) - 1):
-        posi_line_1 = parsePosiLine(posi_lines[i])
-        posi_line_2 = parsePosiLine(posi_lines[i + 1])
+    # i es el índice del segundo punto del tramo (previous_line es el i - 1)
+    for i, posi_line in enumerate(posi_lines):
+        posi = parsePosiLine(posi_line)
         
         # Estima las posiciones si las plantas de los dos puntos son iguales
-        if posi_line_1[4] == posi_line_2[4]:
+        if previous_line is not None and previous_posi[4] == posi[4]:
             
             # Añadir el primer POSI 
-            if (i - 1 != last_add_index):
-                estimated_posis.append(posi_lines[i])
+            if (i - 2 != last_add_index):
+                yield previous_line
             
             # TODO ¿Como añadir la última línea? Afecta al estimate anterior?
-            estimatePositionsBetweenTwoPoints(estimated_posis,posi_line_1,posi_line_2)
+            yield from estimatePositionsBetweenTwoPoints(previous_posi,posi)
             
             # Añadir el segundo POSI
-            estimated_posis.append(posi_lines[i + 1])
+            yield posi_line
             
-            last_add_index = i;
-    
-    return estimated_posis
+            last_add_index = i - 1
+        
+        previous_line = posi_line
+        previous_posi = posi
 
 # Comprueba si hay que estimar las posiciones   
 def shouldEstimatePositions(fileName):
@@ -191,54 +326,105 @@ def isFloorTransitionFile(fileName):
 def isGroundTruthFile(fileName):
     return fileName.startswith(GROUND_TRUTH_PREFIX)
         
-def processFile(root, target_directory, file):
+# Carpeta de destino de un fichero (los Ground Truth van a la carpeta del fichero sin el prefijo)
+def getFinalFolder(target_directory, file):
+    base = os.path.splitext(file)[0]
+    return os.path.join(target_directory, base.removeprefix(GROUND_TRUTH_PREFIX))
+
+# Borra de la carpeta de destino las salidas de un proceso anterior del fichero, en cualquier formato.
+# Si no, al cambiar de formato quedarían los ficheros del anterior (02-LoadDB.py y el entrenamiento usan
+# los .npz si existen) y un fichero sin líneas POSI o WIFI conservaría las de la versión anterior
+def removeOutputs(target_directory, file):
+    base, ext = os.path.splitext(file)
+    final_folder = getFinalFolder(target_directory, file)
+    if isGroundTruthFile(base):
+        # El fichero Ground Truth solo genera el fichero POSI, siempre en .txt
+        names, ext = (POSI_STR,), '.txt'
+    else:
+        names = (POSI_STR, WIFI_STR, f'{POSI_STR}_tmp')
+    for name in names:
+        for output_ext in (ext, NPZ_EXT):
+            output_path = os.path.join(final_folder, f'{name}{output_ext}')
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                logging.info(f"Removed '{output_path}'")
+
+# Procesa un fichero y devuelve su ruta, el tiempo empleado en segundos y si se ha procesado sin errores
+def processFile(root, target_directory, file, output_format=OUTPUT_TEXT):
+    start = time.perf_counter()
     source_path = os.path.join(root, file)
+    success = True
     base, ext = os.path.splitext(file)
     
     # Si no es fichero Ground Truth
     if not isGroundTruthFile(base):
-        final_folder = os.path.join(target_directory, base)
-        # Obtener la líneas POIS y WIFI
-        posi_lines,wifi_lines = getPosiAndWifiLines(source_path)
-
-        # Crear carpeta si hay contenido
-        if posi_lines or wifi_lines:
-            os.makedirs(final_folder, exist_ok=True)
-            logging.info(f"'{final_folder}' directory created")
-            
-        # Crear archivos solo si hay contenido
-        if wifi_lines:
-            wifi_path = os.path.join(final_folder, f'{WIFI_STR}{ext}')
-            writeToFile(wifi_path,wifi_lines)
-            
-        if posi_lines:
-            posi_path = os.path.join(final_folder, f'{POSI_STR}{ext}')
-            if shouldEstimatePositions(base):
-                posi_path = os.path.join(final_folder, f'{POSI_STR}_tmp{ext}')
-            
-            writeToFile(posi_path,posi_lines)
+        final_folder = getFinalFolder(target_directory, file)
+        
+        # Un único recorrido del fichero: las líneas WIFI se escriben al leerlas y las POSI pasan,
+        # línea a línea, por el fichero temporal y la estimación hasta el fichero POSI final.
+        # Solo se crean la carpeta y los ficheros que tienen contenido
+        wifi_writer = createWriter(final_folder, WIFI_STR, ext, WIFI_COLUMNS, output_format)
+        posi_writer = createWriter(final_folder, POSI_STR, ext, POSI_COLUMNS, output_format)
+        # El fichero POSI sin estimar solo se guarda en texto
+        tmp_posi_writer = LazyFileWriter(os.path.join(final_folder, f'{POSI_STR}_tmp{ext}'))
+        
+        try:
+            posi_lines = readPosiAndWifiLines(source_path, wifi_writer)
             
             if shouldEstimatePositions(base):
-                estimated_posis = []
+                if output_format != OUTPUT_NPZ:
+                    posi_lines = writeLines(tmp_posi_writer, posi_lines)
                 if isFloorTransitionFile(base):
-                    estimated_posis = estimatePositionsWithoutTransitions(posi_lines)
+                    posi_lines = estimatePositionsWithoutTransitions(posi_lines)
                 else:
-                    estimated_posis = estimatePositions(posi_lines)
-                    
-                estimated_posi_path = os.path.join(final_folder, f'{POSI_STR}{ext}')
-                writeToFile(estimated_posi_path,estimated_posis)
+                    posi_lines = estimatePositions(posi_lines)
+            
+            for posi_line in posi_lines:
+                posi_writer.write(posi_line)
+        except Exception as e:
+            logging.error(f"Error processing '{source_path}': {e}")
+            success = False
+        finally:
+            wifi_writer.close()
+            tmp_posi_writer.close()
+            posi_writer.close()
     # Si es fichero Ground Truth
     else:
-        final_folder = os.path.join(target_directory, base.removeprefix(GROUND_TRUTH_PREFIX))
+        final_folder = getFinalFolder(target_directory, file)
         os.makedirs(final_folder, exist_ok=True)
-        posi_lines = getPosiFromGroundTruth(source_path)
         posi_path = os.path.join(final_folder, f'{POSI_STR}.txt')
-        writeToFile(posi_path,posi_lines)
+        try:
+            if output_format != OUTPUT_NPZ:
+                writeToFile(posi_path,readPosiFromGroundTruth(source_path))
+            if output_format != OUTPUT_TEXT:
+                npz_writer = NpzFileWriter(os.path.join(final_folder, f'{POSI_STR}{NPZ_EXT}'), POSI_COLUMNS)
+                for posi_line in readPosiFromGroundTruth(source_path):
+                    npz_writer.write(posi_line)
+                npz_writer.close()
+        except Exception as e:
+            logging.error(f"Error processing '{source_path}': {e}")
+            success = False
+
+    return source_path, time.perf_counter() - start, success
         
-def processData():
-    logging.info('DATA PROCESSING STARTED')
+# Procesa en orden los ficheros que escriben en una misma carpeta de destino (un fichero y su GT_)
+# y devuelve el resultado de processFile de cada uno. Las salidas anteriores se borran antes de
+# procesar el primero, para no borrar las que acaba de escribir otro fichero de la carpeta
+def processFolder(root, target_directory, files, output_format=OUTPUT_TEXT):
+    for file in files:
+        removeOutputs(target_directory, file)
+    return [processFile(root, target_directory, file, output_format) for file in files]
+
+# Desempaqueta los argumentos de processFolder (ProcessPoolExecutor.map pasa un único argumento)
+def processFolderTask(task):
+    return processFolder(*task)
 
+# Obtiene las tareas a procesar, una por carpeta de destino con sus ficheros ordenados por nombre
+# (el GT_ antes que el fichero del mismo nombre), y crea las carpetas de destino
+def getTasks(output_format):
+    tasks = []
     for root, dirs, files in os.walk(SOURCE_FOLDER):
+        dirs.sort()
         relative_path = os.path.relpath(root, SOURCE_FOLDER)
         target_directory = os.path.join(DESTINY_FOLDER, relative_path)
         os.makedirs(target_directory, exist_ok=True)
@@ -246,9 +432,92 @@ def processData():
         logging.info('\n//////////////////////////////////////////////////////////')
         logging.info(f"'{target_directory}' directory created")
 
+        folder_files = {}
+        for file in sorted(files):
+            folder_files.setdefault(getFinalFolder(target_directory, file), []).append(file)
+        for final_folder in sorted(folder_files):
+            tasks.append((root, target_directory, folder_files[final_folder], output_format))
+    return tasks
+
+# Descarta las carpetas de destino cuyos ficheros no han cambiado desde el último proceso según el manifiesto
+# (mismo contenido, mismo formato de salida y carpeta de destino existente). Con full se procesan todas.
+# Los ficheros de una carpeta comparten sus salidas, así que si cambia uno se vuelven a procesar todos.
+# Devuelve las tareas a procesar y las nuevas entradas del manifiesto
+def getChangedTasks(tasks, output_format, full):
+    processed = loadManifest(DESTINY_FOLDER, PROCESSED_SECTION)
+    entries = {}
+    changed_tasks = []
+    
+    for task in tasks:
+        root, target_directory, files, _ = task
+        changed = False
         for file in files:
-            processFile(root, target_directory, file)
+            source_path = os.path.join(root, file)
+            key = manifestKey(source_path, SOURCE_FOLDER)
+            previous = processed.get(key)
+            final_folder = getFinalFolder(target_directory, file)
             
+            signature = fileSignature(source_path, previous)
+            entries[key] = {**signature, 'output_format': output_format, 'output_folder': manifestKey(final_folder, DESTINY_FOLDER)}
+            
+            if (full or not sameContent(signature, previous)
+                    or previous.get('output_format') != output_format
+                    or not os.path.isdir(final_folder)):
+                changed = True
+            else:
+                logging.info(f"Unchanged '{source_path}'")
+        
+        if changed:
+            changed_tasks.append(task)
+    
+    return changed_tasks, entries
+
+# Muestra el tiempo de cada fichero y el total
+def logTimings(timings, elapsed, workers):
+    logging.info('\n//////////////////////////////////////////////////////////')
+    logging.info(f"TIMINGS ({workers} workers)")
+    for source_path, seconds, success in timings:
+        logging.info(f"{seconds:10.3f} s  {source_path}{'' if success else '  (ERROR)'}")
+    logging.info(f"{sum(seconds for _, seconds, _ in timings):10.3f} s  sum of {len(timings)} files")
+    logging.info(f"{elapsed:10.3f} s  elapsed")
+
+# Procesa todos los ficheros de SOURCE_FOLDER. Con workers > 1 se reparten entre varios procesos por
+# carpeta de destino; el resultado es el mismo que en serie porque cada tarea es la única que escribe
+# en su carpeta y procesa sus ficheros en el mismo orden.
+# Solo se procesan los ficheros nuevos o modificados desde la última ejecución (full: todos)
+def processData(workers=1, output_format=OUTPUT_TEXT, full=False):
+    logging.info('DATA PROCESSING STARTED')
+    start = time.perf_counter()
+
+    tasks, entries = getChangedTasks(getTasks(output_format), output_format, full)
+    logging.info(f"{sum(len(task[2]) for task in tasks)} of {len(entries)} files to process")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            folder_timings = list(executor.map(processFolderTask, tasks))
+    else:
+        folder_timings = [processFolderTask(task) for task in tasks]
+    timings = [timing for folder_timing in folder_timings for timing in folder_timing]
+    
+    # Si falla un fichero no se guarda en el manifiesto ninguno de su carpeta (sus salidas pueden estar
+    # incompletas) para que se vuelvan a procesar todos en la siguiente ejecución
+    failed = [source_path for source_path, _, success in timings if not success]
+    for folder_timing in folder_timings:
+        if not all(success for _, _, success in folder_timing):
+            for source_path, _, _ in folder_timing:
+                del entries[manifestKey(source_path, SOURCE_FOLDER)]
+    if failed:
+        logging.error(f"{len(failed)} files failed and their folders will be processed again in the next run")
+    
+    # Se guarda el manifiesto cuando ya se han escrito todos los ficheros
+    saveManifest(DESTINY_FOLDER, PROCESSED_SECTION, entries)
+    
+    logTimings(timings, time.perf_counter() - start, workers)
     logging.info('DATA PROCESSING FINISHED')
     
-processData()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Procesa los ficheros de RawData y los guarda en ProcessedData")
+    parser.add_argument("--workers", type=int, default=1, help=f"Procesos en paralelo (1: en serie; núcleos disponibles: {os.cpu_count()})")
+    parser.add_argument("--output", choices=[OUTPUT_TEXT, OUTPUT_NPZ, OUTPUT_BOTH], default=OUTPUT_TEXT, help="Formato de los ficheros procesados")
+    parser.add_argument("--full", action="store_true", help="Procesa todos los ficheros aunque no hayan cambiado")
+    args = parser.parse_args()
+    processData(max(1, args.workers), args.output, args.full)
\ No newline at end of file
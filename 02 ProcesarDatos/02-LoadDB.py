@@ -1,6 +1,9 @@
 import os
 import logging
+import argparse
 import psycopg
+import numpy as np
+from manifest import LOADED_SECTION, manifestKey, loadManifest, saveManifest, fileSignature, sameContent
 
 POSI_STR = 'POSI'
 WIFI_STR = 'WIFI'
@@ -11,11 +14,20 @@ TEMP_FOLDER = 'tmp'
 POSI_FILE_NAME = 'POSI.txt'
 WIFI_FILE_NAME = 'WIFI.txt'
 
+# Ficheros con columnas tipadas que genera 01-ProcessData.py con --output npz/both.
+# Si existen se cargan directamente en lugar de los de texto
+POSI_NPZ_FILE_NAME = 'POSI.npz'
+WIFI_NPZ_FILE_NAME = 'WIFI.npz'
+POSI_NPZ_COLUMNS = ("apptimestamp_ms","counter","latitude","longitude","floorid","buildingid")
+WIFI_NPZ_COLUMNS = ("apptimestamp_ms","sensortimestamp_ms","name_ssid","mac_bssid","frequency","rss")
+NPZ_MS_SUFFIX = '_ms'
+
 TEMP_POSI_FILE_NAME = os.path.join(TEMP_FOLDER, f'{POSI_FILE_NAME}')
 TEMP_WIFI_FILE_NAME = os.path.join(TEMP_FOLDER, f'{WIFI_FILE_NAME}')
 
 DELETE_ORIGINALFILE_SQL = "DELETE FROM tfm_ips.OriginalFile WHERE filename = %s;"
 INSERT_ORIGINALFILE_SQL = "INSERT INTO tfm_ips.OriginalFile(filename) VALUES (%s) RETURNING Id;"
+SELECT_ORIGINALFILES_SQL = "SELECT filename FROM tfm_ips.OriginalFile;"
 
 POSI_TABLE_NAME = "tfm_ips.referencepointsposition"
 WIFI_TABLE_NAME = "tfm_ips.referencepointswifi"
@@ -41,6 +53,12 @@ def deleteOriginalFileFromTable(filename):
     with CONN.cursor() as cur:
         cur.execute(DELETE_ORIGINALFILE_SQL, (filename,))
 
+# Nombres de los ficheros ya cargados en la tabla
+def getOriginalFilesFromTable():
+    with CONN.cursor() as cur:
+        cur.execute(SELECT_ORIGINALFILES_SQL)
+        return {row[0] for row in cur.fetchall()}
+
 # Añade le nombre del fichero a la tabla
 def insertOriginalFileTable(filename):
     logging.info(f"Inserting '{filename}' into OriginalFile table")
@@ -62,6 +80,20 @@ def loadFileToTable(sourceFile, tableName, colums):
                     chunkCount = chunkCount + 1
                     copy.write(data)
 
+# Carga las columnas de un fichero .npz en la tabla con COPY, sin ficheros temporales ni parsear texto.
+# Los timestamps están en milisegundos y se envían en segundos: str(ms / 1000) es exacto con 3 decimales (NUMERIC(8,3))
+def loadNpzToTable(originalFileId, sourceFile, tableName, colums, npzColumns):
+    logging.info(f"Loading file '{sourceFile}' into '{tableName}' table")
+    with np.load(sourceFile) as data:
+        values = [
+            (data[column] / 1000 if column.endswith(NPZ_MS_SUFFIX) else data[column]).tolist()
+            for column in npzColumns
+        ]
+    with CONN.cursor() as cur:
+        with cur.copy(f"COPY {tableName} ({', '.join(colums)}) FROM STDIN") as copy:
+            for row in zip(*values):
+                copy.write_row((originalFileId, *row))
+
 # Agrega todos los datos del fichero de origen al final del fichero de destino
 def copyFile(sourceFile, destinyFile, textToReplace, replacementText):
     with open(sourceFile, "r", encoding="utf-8") as src, \
@@ -88,32 +120,82 @@ def deleteTempFiles():
         os.remove(TEMP_WIFI_FILE_NAME)
         logging.info(f"Temp file '{TEMP_WIFI_FILE_NAME}' removed")
 
-def loadData():
+# Ficheros POSI y WIFI de una carpeta: los .npz si existen, si no los de texto (None si falta alguno)
+def getInputFiles(root):
+    posiNpzFile = os.path.join(root, POSI_NPZ_FILE_NAME)
+    wifiNpzFile = os.path.join(root, WIFI_NPZ_FILE_NAME)
+    if os.path.exists(posiNpzFile) and os.path.exists(wifiNpzFile):
+        return posiNpzFile, wifiNpzFile
+    posiFile = os.path.join(root, POSI_FILE_NAME)
+    wifiFile = os.path.join(root, WIFI_FILE_NAME)
+    if os.path.exists(posiFile) and os.path.exists(wifiFile):
+        return posiFile, wifiFile
+    return None
+
+# Firma (manifiesto) de los ficheros de entrada de una carpeta
+def getInputSignature(posiFile, wifiFile, previous):
+    previous = previous or {}
+    return {
+        os.path.basename(posiFile): fileSignature(posiFile, previous.get(os.path.basename(posiFile))),
+        os.path.basename(wifiFile): fileSignature(wifiFile, previous.get(os.path.basename(wifiFile)))
+    }
+
+# Comprueba si los ficheros de entrada son los mismos que en la última carga
+def sameInputContent(signature, previous):
+    return previous is not None and signature.keys() == previous.keys() and all(
+        sameContent(fileNameSignature, previous[fileName]) for fileName, fileNameSignature in signature.items()
+    )
+
+# Solo se cargan las carpetas nuevas o modificadas desde la última carga según el manifiesto,
+# o que ya no están en la tabla OriginalFile (full: todas)
+def loadData(full=False):
     logging.info('DATA LOADING STARTED')
     
+    loaded = loadManifest(DATA_FOLER, LOADED_SECTION)
+    entries = {}
+    
     try:
         deleteTempFiles()
+        originalFiles = getOriginalFilesFromTable()
         
         for root, dirs, files in os.walk(DATA_FOLER):
-            posiFile = os.path.join(root, POSI_FILE_NAME)
-            wifiFile = os.path.join(root, WIFI_FILE_NAME)
-            if os.path.exists(posiFile) and os.path.exists(wifiFile):
-                logging.info(f"-------------- LOADING ---------------------- '{posiFile}' and '{wifiFile}' into ReferencePointsPosition table")
-                logging.info(f"    - '{posiFile}'")
-                logging.info(f"    - '{wifiFile}'")
-                
-                originalFileName = os.path.basename(root)
-                deleteOriginalFileFromTable(originalFileName)
-                originalFileId = insertOriginalFileTable(originalFileName)
-                
+            inputFiles = getInputFiles(root)
+            if inputFiles is None:
+                continue
+            posiFile, wifiFile = inputFiles
+            originalFileName = os.path.basename(root)
+            
+            key = manifestKey(root, DATA_FOLER)
+            signature = getInputSignature(posiFile, wifiFile, loaded.get(key))
+            entries[key] = signature
+            
+            if not full and originalFileName in originalFiles and sameInputContent(signature, loaded.get(key)):
+                logging.info(f"Unchanged '{root}'")
+                continue
+            
+            logging.info(f"-------------- LOADING ---------------------- '{posiFile}' and '{wifiFile}'")
+            
+            deleteOriginalFileFromTable(originalFileName)
+            originalFileId = insertOriginalFileTable(originalFileName)
+            
+            if posiFile.endswith(POSI_NPZ_FILE_NAME):
+                loadNpzToTable(originalFileId, posiFile, POSI_TABLE_NAME, POSI_TABLE_COLUMNS, POSI_NPZ_COLUMNS)
+                loadNpzToTable(originalFileId, wifiFile, WIFI_TABLE_NAME, WIFI_TABLE_COLUMNS, WIFI_NPZ_COLUMNS)
+            else:
                 createPosiTempFile(originalFileId, posiFile)
                 createWifiTempFile(originalFileId, wifiFile)
                 
-        loadFileToTable(TEMP_POSI_FILE_NAME, POSI_TABLE_NAME, POSI_TABLE_COLUMNS)
-        loadFileToTable(TEMP_WIFI_FILE_NAME, WIFI_TABLE_NAME, WIFI_TABLE_COLUMNS)
+        # Los ficheros temporales solo existen si se ha cargado algún fichero de texto
+        if os.path.exists(TEMP_POSI_FILE_NAME):
+            loadFileToTable(TEMP_POSI_FILE_NAME, POSI_TABLE_NAME, POSI_TABLE_COLUMNS)
+        if os.path.exists(TEMP_WIFI_FILE_NAME):
+            loadFileToTable(TEMP_WIFI_FILE_NAME, WIFI_TABLE_NAME, WIFI_TABLE_COLUMNS)
         
         CONN.commit()
         
+        # El manifiesto solo se actualiza si la carga se ha confirmado
+        saveManifest(DATA_FOLER, LOADED_SECTION, entries)
+        
     except Exception as e:
         logging.error(f"Error loading data: {e}")
         CONN.rollback()
@@ -122,4 +204,8 @@ def loadData():
         
     logging.info('DATA LOADING FINISHED')
     
-loadData()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga los ficheros de ProcessedData en la base de datos")
+    parser.add_argument("--full", action="store_true", help="Carga todos los ficheros aunque no hayan cambiado")
+    args = parser.parse_args()
+    loadData(args.full)
\ No newline at end of file
@@ -0,0 +1,60 @@
+import os
+import json
+import hashlib
+
+# Manifiesto compartido por 01-ProcessData.py y 02-LoadDB.py para los procesos incrementales.
+# Guarda en ProcessedData/manifest.json, por secciones ('processed' y 'loaded'), la firma
+# (tamaño, fecha de modificación y hash del contenido) de cada fichero de entrada ya tratado
+MANIFEST_FILE_NAME = 'manifest.json'
+PROCESSED_SECTION = 'processed'
+LOADED_SECTION = 'loaded'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Ruta relativa con '/' como separador, para que el manifiesto sirva en cualquier sistema operativo
+def manifestKey(path, folder):
+    return os.path.relpath(path, folder).replace(os.sep, '/')
+
+# Lee una sección del manifiesto (vacía si no existe)
+def loadManifest(folder, section):
+    manifest_path = os.path.join(folder, MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get(section, {})
+
+# Reemplaza una sección del manifiesto conservando las demás.
+# Se escribe en un fichero temporal y se renombra para no dejarlo a medias
+def saveManifest(folder, section, entries):
+    manifest_path = os.path.join(folder, MANIFEST_FILE_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    manifest[section] = entries
+
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+# Hash SHA-256 del contenido del fichero
+def fileHash(file_path):
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while data := f.read(HASH_CHUNK_SIZE):
+            file_hash.update(data)
+    return file_hash.hexdigest()
+
+# Firma del fichero. Si el tamaño y la fecha de modificación coinciden con la firma anterior
+# se reutiliza su hash sin leer el fichero
+def fileSignature(file_path, previous=None):
+    stat = os.stat(file_path)
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime_ns:
+        return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': previous['sha256']}
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': fileHash(file_path)}
+
+# Comprueba si el contenido no ha cambiado (un cambio solo de fecha de modificación no cuenta)
+def sameContent(signature, previous):
+    return previous is not None and previous.get('sha256') == signature['sha256']
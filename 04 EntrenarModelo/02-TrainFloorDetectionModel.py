@@ -16,6 +16,9 @@ KNN_PARAMS = {
    
 MODEL_FILENAME_PREFIX = 'floor_detection'
 
+# Mismos ficheros que SQL_TRAINING al entrenar con los ficheros .npz (--npz)
+NPZ_FILTER = {'like': 'TrainingTrial'}
+
 '''SQL_TESTING = """select CONCAT(originalfileid,'_',posiapptimestamp) id,originalfileid,posiapptimestamp,mac_bssid,rss,floorid
 from tfm_ips.ReferencePointsPositionWifi posi_wifi
 join tfm_ips.originalfile ON originalfile.id = posi_wifi.originalfileid
@@ -23,4 +26,4 @@ where originalfile.filename not like '%TrainingTrial%'
 order by id, mac_bssid asc"""'''
 
 Trainer.logging_info(f"TRAINING: {os.path.basename(__file__)}")
-Trainer.train_floor_detection_model(SQL_COLUMNS, SQL_TRAINING, KNN_PARAMS, MODEL_FILENAME_PREFIX)
\ No newline at end of file
+Trainer.train_floor_detection_model(SQL_COLUMNS, SQL_TRAINING, KNN_PARAMS, MODEL_FILENAME_PREFIX, NPZ_FILTER)
\ No newline at end of file
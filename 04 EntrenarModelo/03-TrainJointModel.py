@@ -0,0 +1,30 @@
+import Trainer
+import os
+
+SQL_COLUMNS = "select distinct mac_bssid from tfm_ips.referencepointswifi order by mac_bssid asc;"
+
+# Mismo conjunto de entrenamiento que el modelo 2D (sin los recorridos TrainingTrial5x con transiciones
+# entre plantas): la estimación 2D del modelo conjunto es la misma que la de 01-Train2DModel.py.
+# La votación de planta se hace sobre este mismo conjunto, por lo que puede diferir de 02-TrainFloorDetectionModel.py
+SQL_TRAINING = """select CONCAT(originalfileid,'_',posiapptimestamp) id,originalfileid,posiapptimestamp,mac_bssid,rss,latitude,longitude,floorid
+from tfm_ips.ReferencePointsPositionWifi posi_wifi
+join tfm_ips.originalfile ON originalfile.id = posi_wifi.originalfileid
+where originalfile.filename like '%TrainingTrial%'
+and originalfile.filename not like '%TrainingTrial5%'
+order by id, mac_bssid asc"""
+
+KNN_PARAMS = {
+        'n_neighbors_2d': 3,
+        'n_neighbors_floor': 5,
+        'weights_2d': 'uniform',
+        'weights_floor': 'uniform',
+        'metric': 'manhattan'
+    }
+   
+MODEL_FILENAME_PREFIX = 'joint'
+
+# Mismos ficheros que SQL_TRAINING al entrenar con los ficheros .npz (--npz)
+NPZ_FILTER = {'like': 'TrainingTrial', 'not_like': 'TrainingTrial5'}
+
+Trainer.logging_info(f"TRAINING: {os.path.basename(__file__)}")
+Trainer.train_joint_model(SQL_COLUMNS, SQL_TRAINING, KNN_PARAMS, MODEL_FILENAME_PREFIX, NPZ_FILTER)
\ No newline at end of file
@@ -5,4 +5,7 @@ py "01-Train2DModel.py"
 echo Ejecutando 02-TrainFloorDetectionModel.py...
 py "02-TrainFloorDetectionModel.py"
 
+echo Ejecutando 03-TrainJointModel.py...
+py "03-TrainJointModel.py"
+
 echo Todos los scripts se han ejecutado.
\ No newline at end of file
@@ -4,12 +4,20 @@ import pandas as pd
 import numpy as np
 import joblib
 import json
+import os
+import argparse
 
 from sklearn.preprocessing import StandardScaler
-from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
+from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor, NearestNeighbors
 
 MODELS_FOLDER = 'models'
 
+# Ficheros .npz con columnas tipadas de 01-ProcessData.py (--output npz/both). Con --npz se entrena
+# con ellos en lugar de consultar la base de datos (py 01-Train2DModel.py --npz)
+PROCESSED_DATA_FOLDER = os.path.join('..', '02 ProcesarDatos', 'ProcessedData')
+POSI_NPZ_FILE_NAME = 'POSI.npz'
+WIFI_NPZ_FILE_NAME = 'WIFI.npz'
+
 # Configuración básica de logging
 logging.basicConfig(
     level=logging.INFO, 
@@ -29,9 +37,8 @@ def get_connection():
         port="5432"
     )
     
-def train_2d_model(sql_columns, sql_training, knn_params, model_filename_prefix):
-    df_cols = read_sql(sql_columns)
-    df_train = read_sql(sql_training)
+def train_2d_model(sql_columns, sql_training, knn_params, model_filename_prefix, npz_filter=None):
+    df_cols, df_train = read_training_data(sql_columns, sql_training, npz_filter)
 
     X_train_scaled, y_train, scaler = get_datasets_2d(df_cols, df_train)
 
@@ -42,9 +49,8 @@ def train_2d_model(sql_columns, sql_training, knn_params, model_filename_prefix)
     knn = train_KNN_Regressor(X_train_scaled, y_train, knn_params)
     save_model_to_disk(knn, scaler, df_cols, model_filename_prefix)
     
-def train_floor_detection_model(sql_columns, sql_training, knn_params, model_filename_prefix):
-    df_cols = read_sql(sql_columns)
-    df_train = read_sql(sql_training)
+def train_floor_detection_model(sql_columns, sql_training, knn_params, model_filename_prefix, npz_filter=None):
+    df_cols, df_train = read_training_data(sql_columns, sql_training, npz_filter)
 
     X_train_scaled, y_train, scaler = get_datasets_floor_detection(df_cols, df_train)
 
@@ -55,6 +61,65 @@ def train_floor_detection_model(sql_columns, sql_training, knn_params, model_fil
     knn = train_KNN_Classifier(X_train_scaled, y_train, knn_params)
     save_model_to_disk(knn, scaler, df_cols, model_filename_prefix)
 
+def train_joint_model(sql_columns, sql_training, knn_params, model_filename_prefix, npz_filter=None):
+    df_cols, df_train = read_training_data(sql_columns, sql_training, npz_filter)
+
+    X_train_scaled, y_train, scaler = get_datasets_joint(df_cols, df_train)
+
+    logging_info(f"X_train_scaled shape: {X_train_scaled.shape}")
+    logging_info(f"y_train shape: {y_train.shape}")
+
+    # Configurar y entrenar un único buscador de vecinos para 2D y planta
+    knn = train_joint_KNN(X_train_scaled, y_train, knn_params)
+    save_model_to_disk(knn, scaler, df_cols, model_filename_prefix)
+
+def use_npz():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--npz", action="store_true", help="Entrena con los ficheros .npz de ProcessedData en lugar de la base de datos")
+    return parser.parse_known_args()[0].npz
+
+def read_training_data(sql_columns, sql_training, npz_filter):
+    # Columnas (puntos de acceso) y datos de entrenamiento de la base de datos o de los ficheros .npz
+    if npz_filter is not None and use_npz():
+        return read_npz(npz_filter)
+    return read_sql(sql_columns), read_sql(sql_training)
+
+def read_npz(npz_filter):
+    # Equivalente a SQL_COLUMNS y SQL_TRAINING leyendo directamente los ficheros .npz:
+    # - columnas: todos los puntos de acceso de las carpetas con POSI y WIFI (las que se cargan en la base de datos)
+    # - entrenamiento: mediciones WIFI con el mismo timestamp que una posición (como ReferencePointsPositionWifi)
+    #   de los ficheros cuyo nombre contiene npz_filter["like"] y no contiene npz_filter["not_like"]
+    mac_bssids = set()
+    dfs_train = []
+    
+    for root, dirs, files in sorted(os.walk(PROCESSED_DATA_FOLDER)):
+        posi_file = os.path.join(root, POSI_NPZ_FILE_NAME)
+        wifi_file = os.path.join(root, WIFI_NPZ_FILE_NAME)
+        if not (os.path.exists(posi_file) and os.path.exists(wifi_file)):
+            continue
+        
+        with np.load(wifi_file) as wifi_data:
+            df_wifi = pd.DataFrame({column: wifi_data[column] for column in ("apptimestamp_ms", "mac_bssid", "rss")})
+        mac_bssids.update(df_wifi["mac_bssid"].unique())
+        
+        filename = os.path.basename(root)
+        if npz_filter["like"] not in filename or (npz_filter.get("not_like") and npz_filter["not_like"] in filename):
+            continue
+        
+        with np.load(posi_file) as posi_data:
+            df_posi = pd.DataFrame({column: posi_data[column] for column in ("apptimestamp_ms", "latitude", "longitude", "floorid")})
+        
+        # Los timestamps son milisegundos enteros: la unión es exacta
+        df = df_posi.merge(df_wifi, on="apptimestamp_ms")
+        df.insert(0, "id", filename + "_" + df["apptimestamp_ms"].astype(str))
+        dfs_train.append(df)
+    
+    logging_info(f"Read {len(dfs_train)} .npz training files from '{PROCESSED_DATA_FOLDER}'")
+    
+    df_cols = pd.DataFrame({"mac_bssid": sorted(mac_bssids)})
+    df_train = pd.concat(dfs_train, ignore_index=True).sort_values(["id", "mac_bssid"], ignore_index=True)
+    return df_cols, df_train
+
 def read_sql(sql):
     conn = get_connection()
     df = pd.read_sql(sql, conn)
@@ -103,6 +168,15 @@ def get_datasets_floor_detection(df_cols, df_train):
     
     return X_train_scaled, y_train, scaler
 
+def get_datasets_joint(df_cols, df_train):
+
+    X_train_scaled, scaler = get_x_datasets(df_cols, df_train)
+
+    # Crear las etiquetas de posición y planta
+    y_train = df_train.drop_duplicates("id").set_index("id")[["latitude", "longitude", "floorid"]]
+
+    return X_train_scaled, y_train, scaler
+
 def train_KNN_Regressor(X_train, y_train, knn_params):
     # Configurar y entrenar modelo KNN
     knn = KNeighborsRegressor(**knn_params)
@@ -115,11 +189,87 @@ def train_KNN_Classifier(X_train, y_train, knn_params):
     knn.fit(X_train, y_train)
     return knn
     
+def train_joint_KNN(X_train, y_train, knn_params):
+    # Un único índice de vecinos consultado con el mayor k de los dos modelos
+    n_neighbors_2d = knn_params["n_neighbors_2d"]
+    n_neighbors_floor = knn_params["n_neighbors_floor"]
+    knn = NearestNeighbors(n_neighbors=max(n_neighbors_2d, n_neighbors_floor), metric=knn_params["metric"])
+    knn.fit(X_train)
+
+    # El modelo conjunto guarda el buscador junto con las etiquetas de cada fila
+    return {
+        "neighbors": knn,
+        "positions": y_train[["latitude", "longitude"]].to_numpy(dtype=np.float64),
+        "floors": y_train["floorid"].to_numpy(),
+        "n_neighbors_2d": n_neighbors_2d,
+        "n_neighbors_floor": n_neighbors_floor,
+        "weights_2d": knn_params.get("weights_2d", "uniform"),
+        "weights_floor": knn_params.get("weights_floor", "uniform")
+    }
+    
 def save_model_to_disk(knn, scaler, df_cols, model_filename_prefix):
     # Guardar los ficheros del modelo
     joblib.dump(knn, f"./{MODELS_FOLDER}/{model_filename_prefix}_knn.pkl")
     joblib.dump(scaler, f"./{MODELS_FOLDER}/{model_filename_prefix}_scaler.pkl")
     df_cols.to_csv(f"./{MODELS_FOLDER}/{model_filename_prefix}_columns.csv", index=False, header=False)
+    save_flat_model_to_disk(knn, scaler, df_cols, model_filename_prefix)
+
+def save_flat_model_to_disk(knn, scaler, df_cols, model_filename_prefix):
+    # Guardar el modelo como arrays .npy planos que la API abre con np.load(mmap_mode='r')
+    folder = os.path.join(MODELS_FOLDER, model_filename_prefix)
+    os.makedirs(folder, exist_ok=True)
+
+    manifest = {
+        "columns": df_cols["mac_bssid"].tolist(),
+        "with_mean": bool(scaler.with_mean),
+        "with_std": bool(scaler.with_std)
+    }
+
+    # Estadísticas del scaler
+    if scaler.with_mean:
+        save_array(folder, "scaler_mean", np.asarray(scaler.mean_, dtype=np.float64))
+    if scaler.with_std:
+        save_array(folder, "scaler_scale", np.asarray(scaler.scale_, dtype=np.float64))
+
+    # Matriz de referencia y etiquetas
+    if isinstance(knn, dict):
+        manifest.update({
+            "type": "joint",
+            "metric": knn["neighbors"].effective_metric_,
+            "n_neighbors_2d": knn["n_neighbors_2d"],
+            "n_neighbors_floor": knn["n_neighbors_floor"],
+            "weights_2d": knn["weights_2d"],
+            "weights_floor": knn["weights_floor"]
+        })
+        fit_X = knn["neighbors"]._fit_X
+        save_array(folder, "positions", np.asarray(knn["positions"], dtype=np.float64))
+        save_array(folder, "floors", np.asarray(knn["floors"]))
+    else:
+        manifest.update({
+            "type": "classifier" if isinstance(knn, KNeighborsClassifier) else "regressor",
+            "metric": knn.effective_metric_,
+            "n_neighbors": knn.n_neighbors,
+            "weights": knn.weights
+        })
+        fit_X = knn._fit_X
+        y = knn.classes_[knn._y] if isinstance(knn, KNeighborsClassifier) else knn._y
+        save_array(folder, "y", np.asarray(y))
+
+    save_array(folder, "fit_X", np.ascontiguousarray(fit_X, dtype=np.float64))
+    save_array(folder, "fit_X_float32", np.ascontiguousarray(fit_X, dtype=np.float32))
+
+    # El manifiesto se escribe el último, también de forma atómica
+    tmp_path = os.path.join(folder, "manifest.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(folder, "manifest.json"))
+
+def save_array(folder, name, array):
+    # Escribe en un fichero temporal y lo renombra: los procesos que tienen mapeado
+    # el fichero anterior (API en marcha) siguen leyendo la versión antigua sin errores
+    tmp_path = os.path.join(folder, f"{name}.tmp.npy")
+    np.save(tmp_path, array)
+    os.replace(tmp_path, os.path.join(folder, f"{name}.npy"))
 
 def logging_info(msg):
     logging.info(msg)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import argparse
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from models.wifi_measurement import WifiMeasurement
+from repositories.database_repo import Database
+
+# Compara la escritura del histórico de posiciones y mediciones WIFI con INSERT (executemany) y con COPY.
+# Escribe en la base de datos configurada con dispositivos "benchmark-*" que se borran al terminar.
+# Ejecutar desde 05 APP/backend/app:  python -m benchmarks.database_write_benchmark
+
+# Escritura anterior: un INSERT por posición y executemany de un INSERT por punto de acceso
+INSERT_USER_POSITION = """
+    INSERT INTO tfm_ips.userposition(
+    userid, systemtimestamp, latitude, longitude, floorid)
+    VALUES (%s, %s, %s, %s, %s);
+"""
+
+INSERT_USER_WIFI = """
+    INSERT INTO tfm_ips.userwifi(
+    userid, systemtimestamp, mac_bssid, rss)
+    VALUES (%s, %s, %s, %s);
+"""
+
+DELETE_BENCHMARK_USERS = """
+    DELETE FROM tfm_ips.user WHERE devicename LIKE 'benchmark-%%';
+"""
+
+def random_users_info(n_scans, n_aps, n_devices, rng):
+    # Escaneos sintéticos de n_devices dispositivos con n_aps puntos de acceso cada uno
+    start = datetime.now(ZoneInfo("UTC"))
+    users_info = []
+    for i in range(n_scans):
+        position = {
+            "device_name": f"benchmark-{i % n_devices}",
+            "currentTimestamp": start + timedelta(milliseconds=i),
+            "latitude": float(rng.uniform(49.46, 49.47)),
+            "longitude": float(rng.uniform(11.11, 11.12)),
+            "floorId": int(rng.integers(0, 5))
+        }
+        wifi_measurements = [
+            WifiMeasurement(mac_bssid=f"00:00:00:00:{j // 256:02x}:{j % 256:02x}", rssi=float(rng.integers(-95, -40)))
+            for j in rng.choice(1000, n_aps, replace=False)
+        ]
+        users_info.append((position, wifi_measurements))
+    return users_info
+
+def insert_users_info(cur, users_info, user_ids):
+    for position, wifi_measurements in users_info:
+        user_id = user_ids[position["device_name"]]
+        cur.execute(INSERT_USER_POSITION, (user_id, position["currentTimestamp"], position["latitude"], position["longitude"], position["floorId"]))
+        cur.executemany(INSERT_USER_WIFI, [
+            (user_id, position["currentTimestamp"], measurement.mac_bssid, measurement.rssi)
+            for measurement in wifi_measurements
+        ])
+
+def time_writes(db, users_info, write, batch_size):
+    # Filas por segundo escribiendo los escaneos en transacciones de batch_size escaneos
+    start = time.perf_counter()
+    for i in range(0, len(users_info), batch_size):
+        db._write_users_info(users_info[i:i + batch_size], write)
+    elapsed = time.perf_counter() - start
+    rows = sum(1 + len(wifi_measurements) for _, wifi_measurements in users_info)
+    return rows / elapsed, elapsed / len(users_info) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escritura del histórico de posiciones")
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--aps", type=int, default=30, help="Puntos de acceso por escaneo")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100, help="Escaneos por transacción en los modos por lotes")
+    args = parser.parse_args()
+
+    db = Database()
+    users_info = random_users_info(args.scans, args.aps, args.devices, np.random.default_rng(0))
+    modes = [
+        ("INSERT executemany, 1 scan", insert_users_info, 1),
+        ("COPY, 1 scan", db._copy_users_info, 1),
+        (f"INSERT executemany, {args.batch_size} scans", insert_users_info, args.batch_size),
+        (f"COPY, {args.batch_size} scans", db._copy_users_info, args.batch_size),
+    ]
+
+    print(f"{args.scans} scans, {args.aps} APs per scan, {args.devices} devices")
+    print(f"{'mode':<32} | {'rows/s':>10} | {'ms/scan':>8}")
+    try:
+        for name, write, batch_size in modes:
+            rows_per_second, ms_per_scan = time_writes(db, users_info, write, batch_size)
+            print(f"{name:<32} | {rows_per_second:>10.0f} | {ms_per_scan:>8.3f}")
+    finally:
+        with db.connection() as conn:
+            conn.execute(DELETE_BENCHMARK_USERS)
+            conn.commit()
+        db.clear_user_ids_cache()
+        Database.close_pool()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import argparse
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from config.config import Config
+from services.fingerprint_encoder import FingerprintEncoder
+from services.knn_engine import from_sklearn
+
+# Compara la inferencia de sklearn con los motores propios sobre los modelos configurados.
+# Ejecutar desde 05 APP/backend/app:  python -m benchmarks.knn_engine_benchmark
+
+def random_scans(encoder, n_scans, n_heard, rng):
+    # Escaneos sintéticos con n_heard puntos de acceso conocidos
+    columns = list(encoder.column_index)
+    scans = []
+    for _ in range(n_scans):
+        heard = rng.choice(len(columns), n_heard, replace=False)
+        scans.append({columns[i]: float(rng.integers(-95, -40)) for i in heard})
+    return encoder.encode_many(scans)
+
+def time_single(model, X):
+    # Latencia media por escaneo con una llamada predict por fila
+    start = time.perf_counter()
+    for x in X:
+        model.predict(x[np.newaxis, :])
+    return (time.perf_counter() - start) / len(X) * 1e6
+
+def time_batch(model, X):
+    # Rendimiento con una única llamada predict para todas las filas
+    start = time.perf_counter()
+    model.predict(X)
+    return len(X) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de motores KNN")
+    parser.add_argument("--scans", type=int, default=500)
+    # Los escaneos reales de RawData oyen una mediana de 15 puntos de acceso del modelo
+    parser.add_argument("--heard", type=int, default=15, help="Puntos de acceso por escaneo")
+    args = parser.parse_args()
+
+    config = Config()
+    rng = np.random.default_rng(0)
+    for name, models in (("2d", config.models_2d), ("floor_detection", config.models_fd)):
+        knn = joblib.load(models["knn"])
+        columns = pd.read_csv(models["columns"], header=None).values.flatten().tolist()
+        encoder = FingerprintEncoder.from_scaler(columns, joblib.load(models["scaler"]))
+        X = random_scans(encoder, args.scans, args.heard, rng)
+        reference = knn.predict(X)
+
+        print(f"\n{name}: reference matrix {knn._fit_X.shape}, {args.scans} scans, {args.heard} APs per scan")
+        print(f"{'engine':<24} | {'single (us)':>11} | {'batch (scans/s)':>15} | {'agreement':>9}")
+        engines = [
+            ("sklearn", knn),
+            ("brute_force float64", from_sklearn(knn, encoder.baseline, "brute_force", "float64")),
+            ("brute_force float32", from_sklearn(knn, encoder.baseline, "brute_force", "float32")),
+            ("inverted_index", from_sklearn(knn, encoder.baseline, "inverted_index")),
+        ]
+        for engine_name, model in engines:
+            prediction = model.predict(X)
+            if prediction.ndim > 1:
+                agreement = np.mean(np.all(np.isclose(prediction, reference, rtol=0, atol=1e-9), axis=1))
+            else:
+                agreement = np.mean(prediction == reference)
+            print(f"{engine_name:<24} | {time_single(model, X):>11.1f} | {time_batch(model, X):>15.0f} | {agreement:>9.2%}")
+
+if __name__ == "__main__":
+    main()
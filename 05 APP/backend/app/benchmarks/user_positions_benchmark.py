@@ -0,0 +1,92 @@
+import argparse
+import time
+import pandas as pd
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from models.user import User
+from repositories.database_repo import Database
+
+# Compara la lectura de las últimas posiciones con pandas (read_sql + iterrows) y con el row factory de psycopg.
+# Crea n personas "benchmark-*" con una posición en la base de datos configurada y las borra al terminar.
+# Ejecutar desde 05 APP/backend/app:  python -m benchmarks.user_positions_benchmark
+
+INSERT_BENCHMARK_USERS = """
+    INSERT INTO tfm_ips.user (devicename)
+    SELECT 'benchmark-' || i FROM generate_series(1, %s) AS i
+    RETURNING id;
+"""
+
+DELETE_BENCHMARK_USERS = """
+    DELETE FROM tfm_ips.user WHERE devicename LIKE 'benchmark-%%';
+"""
+
+# Lectura anterior: pandas y conversión de zona horaria fila a fila
+PANDAS_USERS_POSITIONS_QUERY = """
+    SELECT ulp.positionid as id, u.devicename as devicename, ulp.userid as userid,
+        ulp.systemtimestamp as systemtimestamp, ulp.latitude as latitude, ulp.longitude as longitude, ulp.floorid as floorid
+    FROM tfm_ips.userlatestposition ulp
+    join tfm_ips.user u on ulp.userid = u.id
+    ORDER BY ulp.userid;
+"""
+
+def pandas_users_positions(db, current_timezone):
+    with db.connection() as conn:
+        df = pd.read_sql(PANDAS_USERS_POSITIONS_QUERY, conn)
+        conn.rollback()
+    return [
+        User(
+            id=row["id"],
+            userId=row["userid"],
+            deviceName=row["devicename"],
+            lastUpdateTimestamp=row["systemtimestamp"].replace(tzinfo=ZoneInfo("UTC")).astimezone(current_timezone),
+            latitude=row["latitude"],
+            longitude=row["longitude"],
+            floorId=row["floorid"],
+            lastUpdateInSeconds=-1
+        )
+        for _, row in df.iterrows()
+    ]
+
+def time_read(read, repeat):
+    # Milisegundos por lectura (mejor de 'repeat' repeticiones)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        users = read()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(users)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lectura de las últimas posiciones")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = Database()
+    current_timezone = ZoneInfo(db.config.timezone)
+    now = datetime.now(ZoneInfo("UTC"))
+    try:
+        with db.connection() as conn:
+            user_ids = [row[0] for row in conn.execute(INSERT_BENCHMARK_USERS, (args.users,)).fetchall()]
+            with conn.cursor() as cur:
+                with cur.copy(db.COPY_USER_POSITION) as copy:
+                    for user_id in user_ids:
+                        copy.write_row((user_id, now, 49.46, 11.11, 0))
+            conn.commit()
+
+        print(f"{args.users} benchmark users")
+        print(f"{'reader':<28} | {'ms':>8} | {'users':>8}")
+        for name, read in (
+            ("pandas read_sql + iterrows", lambda: pandas_users_positions(db, current_timezone)),
+            ("psycopg class_row", db.get_users_positions),
+        ):
+            ms, n_users = time_read(read, args.repeat)
+            print(f"{name:<28} | {ms:>8.1f} | {n_users:>8}")
+    finally:
+        with db.connection() as conn:
+            conn.execute(DELETE_BENCHMARK_USERS)
+            conn.commit()
+        Database.close_pool()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
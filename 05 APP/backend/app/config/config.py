@@ -31,4 +31,40 @@ class Config:
 
     @property
     def models_fd(self):
-        return self._config.get("models_fd", {})
\ No newline at end of file
+        return self._config.get("models_fd", {})
+
+    @property
+    def models_joint(self):
+        return self._config.get("models_joint", {})
+
+    @property
+    def knn_engine(self):
+        return self._config.get("knn_engine", {})
+
+    @property
+    def estimation_cache(self):
+        return self._config.get("estimation_cache", {})
+
+    @property
+    def estimation_batcher(self):
+        return self._config.get("estimation_batcher", {})
+
+    @property
+    def executors(self):
+        return self._config.get("executors", {})
+
+    @property
+    def write_behind(self):
+        return self._config.get("write_behind", {})
+
+    @property
+    def partitioning(self):
+        return self._config.get("partitioning", {})
+
+    @property
+    def position_stream(self):
+        return self._config.get("position_stream", {})
+
+    @property
+    def model_reload(self):
+        return self._config.get("model_reload", {})
@@ -1,10 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers.user_position_router import user_positions_router
-from routers.estimation_router import estimation_router
+from routers.estimation_router import estimation_router, estimation_batcher, write_behind_buffer
 from routers.date_router import date_router
+from routers.metrics_router import metrics_router
+from services.executor_service import ExecutorService
+from repositories.database_repo import Database
+from repositories.async_database_repo import AsyncDatabase
+from services.partition_service import PartitionService
+from services.position_broadcaster import PositionBroadcaster
+from config.config import Config
 
-app = FastAPI()
+# Mantenimiento de las particiones del histórico (opcional)
+partition_service = PartitionService() if Config().partitioning.get("enabled", False) else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if partition_service is not None:
+        await partition_service.start()
+    yield
+    # Cierra los streams de posiciones abiertos
+    PositionBroadcaster().close()
+    # Detiene las tareas en segundo plano al parar el servicio
+    if partition_service is not None:
+        await partition_service.stop()
+    if estimation_batcher is not None:
+        await estimation_batcher.stop()
+    # Escribe el histórico pendiente antes de cerrar las conexiones
+    if write_behind_buffer is not None:
+        await write_behind_buffer.stop()
+    ExecutorService().shutdown()
+    Database.close_pool()
+    await AsyncDatabase.close_async_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:4173"
@@ -20,6 +50,7 @@ app.add_middleware(
 app.include_router(user_positions_router, prefix="/users", tags=["User Positions"])
 app.include_router(estimation_router, prefix="/estimator", tags=["Estimator"])
 app.include_router(date_router, prefix="/datetime", tags=["Date Time"])
+app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
 
 @app.get("/")
 def root():
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-@dataclass
+# slots=True: objetos compactos y de acceso más rápido (se crea uno por persona en cada consulta)
+@dataclass(slots=True)
 class User:
     id: int
     userId: str
@@ -0,0 +1,173 @@
+import asyncio
+import time
+import psycopg
+from contextlib import asynccontextmanager
+from psycopg.rows import class_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from typing import List
+from models.user import User
+from repositories.database_repo import Database
+
+class AsyncDatabase(Database):
+    # Variante asíncrona de Database (psycopg AsyncConnection + AsyncConnectionPool) para el
+    # backend FastAPI. Usa las mismas consultas y parámetros de conexión que Database.
+    # En Windows psycopg asíncrono necesita el bucle de eventos Selector (no Proactor), y uvicorn usa
+    # Proactor por defecto: por eso solo se usa con database.async = true, que está desactivado por defecto.
+
+    # Pool asíncrono compartido por todas las instancias de AsyncDatabase del proceso
+    _async_pool = None
+    _async_pool_lock = asyncio.Lock()
+
+    async def get_pool(self):
+        # Crea y abre el pool la primera vez que se necesita
+        async with AsyncDatabase._async_pool_lock:
+            if AsyncDatabase._async_pool is None:
+                pool = AsyncConnectionPool(
+                    kwargs=self.conn_params,
+                    min_size=self.pool_conf.get("min_size", 2),
+                    max_size=self.pool_conf.get("max_size", 10),
+                    timeout=self.pool_conf.get("timeout", 5),
+                    max_idle=self.pool_conf.get("max_idle", 300),
+                    # Comprueba que la conexión sigue viva antes de entregarla
+                    check=AsyncConnectionPool.check_connection,
+                    name="tfm_ips_async",
+                    open=False
+                )
+                await pool.open()
+                AsyncDatabase._async_pool = pool
+            return AsyncDatabase._async_pool
+
+    @classmethod
+    async def close_async_pool(cls):
+        # Cierra el pool al parar el servicio
+        async with cls._async_pool_lock:
+            if cls._async_pool is not None:
+                await cls._async_pool.close()
+                cls._async_pool = None
+
+    @asynccontextmanager
+    async def connection(self):
+        # Toma una conexión del pool y la devuelve al terminar (con rollback si hubo error)
+        pool = await self.get_pool()
+        start = time.perf_counter()
+        try:
+            conn = await pool.getconn()
+        except PoolTimeout:
+            self.metrics.increment("database.async_pool_timeouts")
+            raise
+        self.metrics.observe("database.async_pool_acquire_ms", (time.perf_counter() - start) * 1000)
+
+        try:
+            yield conn
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            await pool.putconn(conn)
+            stats = pool.get_stats()
+            self.metrics.set_gauge("database.async_pool_size", stats.get("pool_size", 0))
+            self.metrics.set_gauge("database.async_pool_available", stats.get("pool_available", 0))
+            self.metrics.set_gauge("database.async_requests_waiting", stats.get("requests_waiting", 0))
+
+    async def get_users_positions(self) -> List[User]:
+        # Devuelve las posiciones actuales de personas como objetos User construidos por el cursor.
+        async with self.connection() as conn:
+            async with conn.cursor(row_factory=class_row(User)) as cur:
+                await cur.execute(self.GET_USERS_POSITIONS_QUERY)
+                users = await cur.fetchall()
+            # Cierra la transacción de lectura antes de devolver la conexión al pool
+            await conn.rollback()
+
+        return users
+
+    async def get_users_positions_since(self, since=None):
+        # Devuelve (cursor, reset, personas cuya posición ha cambiado desde 'since'); sin 'since' todas.
+        # Si se han borrado posiciones desde 'since' se devuelven todas con reset = True.
+        # El cursor se lee antes que los borrados y las posiciones y es el 'since' de la siguiente consulta.
+        reset = False
+        async with self.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(self.GET_USERS_POSITIONS_CURSOR)
+                cursor = int((await cur.fetchone())[0])
+                if since is not None:
+                    await cur.execute(self.GET_USERS_POSITIONS_RESET, (str(since),))
+                    row = await cur.fetchone()
+                    reset = row is None or row[0]
+            async with conn.cursor(row_factory=class_row(User)) as cur:
+                if since is None or reset:
+                    await cur.execute(self.GET_USERS_POSITIONS_QUERY)
+                else:
+                    await cur.execute(self.GET_USERS_POSITIONS_SINCE_QUERY, (str(since),))
+                users = await cur.fetchall()
+            # Cierra la transacción de lectura antes de devolver la conexión al pool
+            await conn.rollback()
+
+        return cursor, reset, users
+
+    async def _resolve_user_ids(self, cur, users_info):
+        # Obtiene o inserta las personas usuarias: ninguna consulta si están en caché, una como máximo
+        user_ids, missing = self._cached_user_ids(users_info)
+        if missing:
+            await cur.execute(self.UPSERT_USERS, (missing,))
+            user_ids.update(await cur.fetchall())
+        return user_ids
+
+    async def _write_users_info(self, users_info, write):
+        # Ejecuta write(cur, users_info, user_ids) en una transacción y guarda los ids en caché tras el commit.
+        # Si otro proceso ha borrado las personas usuarias los ids en caché ya no existen: se vacía la caché y se reintenta una vez
+        for attempt in range(2):
+            try:
+                async with self.connection() as conn:
+                    async with conn.cursor() as cur:
+                        user_ids = await self._resolve_user_ids(cur, users_info)
+                        await write(cur, users_info, user_ids)
+
+                    await conn.commit()
+                self._user_ids.update(user_ids)
+                return user_ids
+            except psycopg.errors.ForeignKeyViolation:
+                self.clear_user_ids_cache()
+                if attempt == 1:
+                    raise
+
+    async def _copy_users_info(self, cur, users_info, user_ids):
+        position_rows, wifi_rows = self._copy_rows(users_info, user_ids)
+        async with cur.copy(self.COPY_USER_POSITION) as copy:
+            for row in position_rows:
+                await copy.write_row(row)
+        async with cur.copy(self.COPY_USER_WIFI) as copy:
+            for row in wifi_rows:
+                await copy.write_row(row)
+
+    async def update_user_info(self, position, wifi_measurements):
+        # Actualiza la información de la base de datos online de la persona
+        await self.update_users_info([(position, wifi_measurements)])
+
+    async def update_users_info(self, users_info):
+        # Actualiza la información de varias personas en una única transacción,
+        # con un único COPY de posiciones y otro de mediciones WIFI para todo el lote.
+        # users_info es una lista de tuplas (position, wifi_measurements)
+        # Devuelve los ids de las personas (None si ha fallado)
+        try:
+            return await self._write_users_info(users_info, self._copy_users_info)
+
+        except Exception as e:
+            print(e)
+
+    async def copy_users_info(self, users_info):
+        # Carga la información de varias personas con COPY en una única transacción.
+        # A diferencia de update_users_info propaga el error para que lo gestione quien llama.
+        return await self._write_users_info(users_info, self._copy_users_info)
+
+    async def clear_users_positions(self):
+        # Borra los datos la base de datos de ubicaciones online
+        try:
+            async with self.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(self.DELETE_USERS)
+
+                await conn.commit()
+            self.clear_user_ids_cache()
+
+        except Exception as e:
+            print(e)
\ No newline at end of file
@@ -1,57 +1,148 @@
 import psycopg
 import json
-import pandas as pd
+from psycopg import sql
+from psycopg.rows import class_row
+import threading
+import time
+from contextlib import contextmanager
+from psycopg_pool import ConnectionPool, PoolTimeout
+from datetime import datetime, time as dt_time, timedelta
 from zoneinfo import ZoneInfo
 from typing import List
 from models.user import User
 from config.config import Config
+from services.metrics_service import MetricsService
 
 class Database:
     
     config = Config()
     
-    CURRENT_TIMEZONE = ZoneInfo(config.timezone)
-    
-    GET_USER = """
-        SELECT id FROM tfm_ips.user
-        WHERE devicename = %s
-    """
-    
-    UPDATE_USER = """
+    # Inserta las personas usuarias que no existen y devuelve el id de todas en una única consulta
+    UPSERT_USERS = """
         INSERT INTO tfm_ips.user (devicename)
-        VALUES (%s) RETURNING id;
+        SELECT unnest(%s::text[])
+        ON CONFLICT (devicename) DO UPDATE SET devicename = EXCLUDED.devicename
+        RETURNING devicename, id;
     """
     
-    UPDATE_USER_POSITION = """
-        INSERT INTO tfm_ips.userposition(
-        userid, systemtimestamp, latitude, longitude, floorid)
-        VALUES (%s, %s, %s, %s, %s);
+    COPY_USER_POSITION = """
+        COPY tfm_ips.userposition (userid, systemtimestamp, latitude, longitude, floorid) FROM STDIN
     """
     
-    UPDATE_USER_WIFI = """
-        INSERT INTO tfm_ips.userwifi(
-        userid, systemtimestamp, mac_bssid, rss)
-        VALUES (%s, %s, %s, %s);
+    COPY_USER_WIFI = """
+        COPY tfm_ips.userwifi (userid, systemtimestamp, mac_bssid, rss) FROM STDIN
     """
     
+    # Última posición de cada persona desde UserLatestPosition (mantenida por un trigger sobre UserPosition).
+    # Los alias coinciden con los campos de User para construir los objetos directamente con class_row.
     GET_USERS_POSITIONS_QUERY = """
-        SELECT DISTINCT ON (userid)
-            up.id as id,
-			u.devicename as devicename,
-            userid,
-            systemtimestamp,
-            latitude,
-            longitude,
-            floorid
-        FROM tfm_ips.userposition up
-		join tfm_ips.user u on up.userid = u.id
-        ORDER BY userid, systemtimestamp DESC;
+        SELECT
+            ulp.positionid as "id",
+            ulp.userid as "userId",
+            u.devicename as "deviceName",
+            ulp.systemtimestamp as "lastUpdateTimestamp",
+            ulp.latitude as "latitude",
+            ulp.longitude as "longitude",
+            ulp.floorid as "floorId",
+            -1 as "lastUpdateInSeconds"
+        FROM tfm_ips.userlatestposition ulp
+        join tfm_ips.user u on ulp.userid = u.id
+        ORDER BY ulp.userid;
+    """
+
+    # Cursor de las consultas incrementales: transacción más antigua en curso al empezar la consulta.
+    # Toda fila no vista todavía la escribe una transacción igual o posterior, así que no se pierde ningún cambio
+    # (puede repetirse alguno, que el cliente sustituye sin más).
+    # Una transacción larga (de cualquier sesión) retiene pg_snapshot_xmin: mientras dura, el cursor no avanza
+    # y todos los clientes reciben en cada consulta las posiciones escritas desde que empezó.
+    GET_USERS_POSITIONS_CURSOR = """
+        SELECT pg_snapshot_xmin(pg_current_snapshot())::text;
+    """
+
+    # Indica si se han borrado posiciones desde el cursor: los borrados no aparecen en la consulta incremental
+    GET_USERS_POSITIONS_RESET = """
+        SELECT txid >= %s::xid8 FROM tfm_ips.userlatestpositiondeletion;
+    """
+
+    # Personas cuya última posición han escrito transacciones desde el cursor (índice sobre txid)
+    GET_USERS_POSITIONS_SINCE_QUERY = """
+        SELECT
+            ulp.positionid as "id",
+            ulp.userid as "userId",
+            u.devicename as "deviceName",
+            ulp.systemtimestamp as "lastUpdateTimestamp",
+            ulp.latitude as "latitude",
+            ulp.longitude as "longitude",
+            ulp.floorid as "floorId",
+            -1 as "lastUpdateInSeconds"
+        FROM tfm_ips.userlatestposition ulp
+        join tfm_ips.user u on ulp.userid = u.id
+        WHERE ulp.txid >= %s::xid8
+        ORDER BY ulp.userid;
     """
 
     DELETE_USERS = """
         DELETE FROM tfm_ips.user;
     """
+
+    # Tablas de histórico particionadas por día según systemtimestamp
+    PARTITIONED_TABLES = ("userposition", "userwifi")
+
+    LIST_PARTITIONS = """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'tfm_ips' AND parent.relname = %s;
+    """
+
+    # Evita que varios procesos del backend creen o borren particiones a la vez
+    LOCK_PARTITIONS = """
+        SELECT pg_advisory_xact_lock(hashtext('tfm_ips.partitions'));
+    """
+
+    CREATE_PARTITION = sql.SQL("""
+        CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table}
+        FOR VALUES FROM ({start}) TO ({end});
+    """)
+
+    DROP_PARTITION = sql.SQL("""
+        DROP TABLE IF EXISTS {partition};
+    """)
+
+    # Días (UTC) con filas en la partición por defecto
+    LIST_DEFAULT_PARTITION_DAYS = sql.SQL("""
+        SELECT DISTINCT (systemtimestamp AT TIME ZONE 'UTC')::date FROM {partition};
+    """)
+
+    # Saca de la partición por defecto las filas de un día antes de crear su partición
+    # (PostgreSQL no permite crearla mientras la partición por defecto tenga filas de ese rango)
+    MOVE_OUT_OF_DEFAULT_PARTITION = sql.SQL("""
+        CREATE TEMP TABLE moved_rows AS
+        WITH moved AS (
+            DELETE FROM {partition} WHERE systemtimestamp >= {start} AND systemtimestamp < {end} RETURNING *
+        )
+        SELECT * FROM moved;
+    """)
+
+    # Vuelve a insertar las filas movidas, que ahora van a la partición del día, conservando sus ids
+    MOVE_INTO_PARTITION = sql.SQL("""
+        INSERT INTO {table} OVERRIDING SYSTEM VALUE SELECT * FROM moved_rows;
+        DROP TABLE moved_rows;
+    """)
+
+    DELETE_FROM_DEFAULT_PARTITION = sql.SQL("""
+        DELETE FROM {partition} WHERE systemtimestamp < {end};
+    """)
     
+    # Caché devicename -> id compartida por todas las instancias (también las de AsyncDatabase)
+    _user_ids = {}
+
+    # Pool de conexiones compartido por todas las instancias de Database del proceso
+    _pool = None
+    _pool_lock = threading.Lock()
+
     def __init__(self):
         db_conf = self.config.database
 
@@ -61,79 +152,271 @@ class Database:
             "user": db_conf["user"],
             "password": db_conf["password"],
             "host": db_conf["host"],
-            "port": db_conf["port"]
+            "port": db_conf["port"],
+            # Zona horaria de la sesión: PostgreSQL devuelve los timestamptz ya convertidos a la zona configurada
+            "options": f"-c TimeZone={self.config.timezone}"
         }
+        self.pool_conf = db_conf.get("pool", {})
+        self.metrics = MetricsService()
 
     def get_connection(self):
         # Devuelve una conexión nueva a PostgreSQL usando psycopg.
         return psycopg.connect(**self.conn_params)
 
+    def get_pool(self):
+        # Crea el pool la primera vez que se necesita
+        with Database._pool_lock:
+            if Database._pool is None:
+                Database._pool = ConnectionPool(
+                    kwargs=self.conn_params,
+                    min_size=self.pool_conf.get("min_size", 2),
+                    max_size=self.pool_conf.get("max_size", 10),
+                    timeout=self.pool_conf.get("timeout", 5),
+                    max_idle=self.pool_conf.get("max_idle", 300),
+                    # Comprueba que la conexión sigue viva antes de entregarla
+                    check=ConnectionPool.check_connection,
+                    name="tfm_ips",
+                    open=True
+                )
+            return Database._pool
+
+    @classmethod
+    def close_pool(cls):
+        # Cierra el pool al parar el servicio
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.close()
+                cls._pool = None
+
+    @contextmanager
+    def connection(self):
+        # Toma una conexión del pool y la devuelve al terminar (con rollback si hubo error)
+        pool = self.get_pool()
+        start = time.perf_counter()
+        try:
+            conn = pool.getconn()
+        except PoolTimeout:
+            self.metrics.increment("database.pool_timeouts")
+            raise
+        self.metrics.observe("database.pool_acquire_ms", (time.perf_counter() - start) * 1000)
+
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+            stats = pool.get_stats()
+            self.metrics.set_gauge("database.pool_size", stats.get("pool_size", 0))
+            self.metrics.set_gauge("database.pool_available", stats.get("pool_available", 0))
+            self.metrics.set_gauge("database.requests_waiting", stats.get("requests_waiting", 0))
+
     def get_users_positions(self) -> List[User]:
-        #Devuelve un DataFrame con las posiciones actuales de personas.
-        with self.get_connection() as conn:
-            df = pd.read_sql(self.GET_USERS_POSITIONS_QUERY, conn)
-        
-        users = [
-            User(
-                id=row["id"],
-                userId=row["userid"],
-                deviceName=row["devicename"],
-                lastUpdateTimestamp=row["systemtimestamp"].replace(tzinfo=ZoneInfo("UTC")).astimezone(self.CURRENT_TIMEZONE),
-                latitude=row["latitude"],
-                longitude=row["longitude"],
-                floorId=row["floorid"],
-                lastUpdateInSeconds=-1
-            )
-            for _, row in df.iterrows()
-        ]
+        # Devuelve las posiciones actuales de personas como objetos User construidos por el cursor.
+        with self.connection() as conn:
+            with conn.cursor(row_factory=class_row(User)) as cur:
+                cur.execute(self.GET_USERS_POSITIONS_QUERY)
+                users = cur.fetchall()
+            # Cierra la transacción de lectura antes de devolver la conexión al pool
+            conn.rollback()
 
         return users
         
-    def update_user_info(self, position, wifi_measurements):
-        # Actualiza la información de la base de datos online de la persona
-        try:
-            conn = self.get_connection()
-            
+    def get_users_positions_since(self, since=None):
+        # Devuelve (cursor, reset, personas cuya posición ha cambiado desde 'since'); sin 'since' todas.
+        # Si se han borrado posiciones desde 'since' se devuelven todas con reset = True.
+        # El cursor se lee antes que los borrados y las posiciones y es el 'since' de la siguiente consulta.
+        reset = False
+        with self.connection() as conn:
             with conn.cursor() as cur:
-                # Obtiene o inserta la persona usuaria
-                cur.execute(self.GET_USER, (position["device_name"],))
-                row = cur.fetchone()
-                if row is not None:
-                    user_id = row[0]
+                cur.execute(self.GET_USERS_POSITIONS_CURSOR)
+                cursor = int(cur.fetchone()[0])
+                if since is not None:
+                    cur.execute(self.GET_USERS_POSITIONS_RESET, (str(since),))
+                    row = cur.fetchone()
+                    reset = row is None or row[0]
+            with conn.cursor(row_factory=class_row(User)) as cur:
+                if since is None or reset:
+                    cur.execute(self.GET_USERS_POSITIONS_QUERY)
                 else:
-                    cur.execute(self.UPDATE_USER, (position["device_name"],))
-                    user_id = cur.fetchone()[0]
+                    cur.execute(self.GET_USERS_POSITIONS_SINCE_QUERY, (str(since),))
+                users = cur.fetchall()
+            # Cierra la transacción de lectura antes de devolver la conexión al pool
+            conn.rollback()
 
-                # Actualiza su posición
-                cur.execute(self.UPDATE_USER_POSITION, (user_id,position["currentTimestamp"],position["latitude"],position["longitude"],position["floorId"],))
-                
-                # Actualiza sus mediciones WIFI
-                wifi_records = [
-                        (user_id, position["currentTimestamp"], measurement.mac_bssid, measurement.rssi)
-                        for measurement in wifi_measurements
-                    ]
-                cur.executemany(self.UPDATE_USER_WIFI, wifi_records)
-            
-            conn.commit()
+        return cursor, reset, users
+
+    def _cached_user_ids(self, users_info):
+        # Ids en caché y nombres de dispositivo que hay que resolver en base de datos
+        user_ids = {}
+        missing = set()
+        for position, _ in users_info:
+            device_name = position["device_name"]
+            user_id = self._user_ids.get(device_name)
+            if user_id is not None:
+                user_ids[device_name] = user_id
+            else:
+                missing.add(device_name)
+        self.metrics.increment("database.user_cache_hits", len(user_ids))
+        self.metrics.increment("database.user_cache_misses", len(missing))
+        # Orden fijo para que transacciones concurrentes bloqueen las filas en el mismo orden
+        return user_ids, sorted(missing)
+
+    def _resolve_user_ids(self, cur, users_info):
+        # Obtiene o inserta las personas usuarias: ninguna consulta si están en caché, una como máximo
+        user_ids, missing = self._cached_user_ids(users_info)
+        if missing:
+            cur.execute(self.UPSERT_USERS, (missing,))
+            user_ids.update(cur.fetchall())
+        return user_ids
+
+    def clear_user_ids_cache(self):
+        # Vacía la caché devicename -> id
+        self._user_ids.clear()
+
+    def _write_users_info(self, users_info, write):
+        # Ejecuta write(cur, users_info, user_ids) en una transacción y guarda los ids en caché tras el commit.
+        # Si otro proceso ha borrado las personas usuarias los ids en caché ya no existen: se vacía la caché y se reintenta una vez
+        for attempt in range(2):
+            try:
+                with self.connection() as conn:
+                    with conn.cursor() as cur:
+                        user_ids = self._resolve_user_ids(cur, users_info)
+                        write(cur, users_info, user_ids)
+
+                    conn.commit()
+                self._user_ids.update(user_ids)
+                return user_ids
+            except psycopg.errors.ForeignKeyViolation:
+                self.clear_user_ids_cache()
+                if attempt == 1:
+                    raise
+
+    def _copy_rows(self, users_info, user_ids):
+        # Filas de posición y de mediciones WIFI para cargar con COPY
+        position_rows = []
+        wifi_rows = []
+        for position, wifi_measurements in users_info:
+            user_id = user_ids[position["device_name"]]
+            position_rows.append((user_id, position["currentTimestamp"], position["latitude"], position["longitude"], position["floorId"]))
+            # La columna RSS es entera: se redondea igual que PostgreSQL al convertir (al par)
+            wifi_rows.extend(
+                (user_id, position["currentTimestamp"], measurement.mac_bssid, round(measurement.rssi))
+                for measurement in wifi_measurements
+            )
+        return position_rows, wifi_rows
+
+    def _copy_users_info(self, cur, users_info, user_ids):
+        position_rows, wifi_rows = self._copy_rows(users_info, user_ids)
+        with cur.copy(self.COPY_USER_POSITION) as copy:
+            for row in position_rows:
+                copy.write_row(row)
+        with cur.copy(self.COPY_USER_WIFI) as copy:
+            for row in wifi_rows:
+                copy.write_row(row)
+
+    def update_user_info(self, position, wifi_measurements):
+        # Actualiza la información de la base de datos online de la persona
+        self.update_users_info([(position, wifi_measurements)])
+
+    def update_users_info(self, users_info):
+        # Actualiza la información de varias personas en una única transacción,
+        # con un único COPY de posiciones y otro de mediciones WIFI para todo el lote.
+        # users_info es una lista de tuplas (position, wifi_measurements)
+        # Devuelve los ids de las personas (None si ha fallado)
+        try:
+            return self._write_users_info(users_info, self._copy_users_info)
             
         except Exception as e:
             print(e)
-            conn.rollback()
-        finally:
-            conn.close()
+
+    def copy_users_info(self, users_info):
+        # Carga la información de varias personas con COPY en una única transacción.
+        # A diferencia de update_users_info propaga el error para que lo gestione quien llama.
+        return self._write_users_info(users_info, self._copy_users_info)
 
     def clear_users_positions(self):
         # Borra los datos la base de datos de ubicaciones online
         try:
-            conn = self.get_connection()
-            
-            with conn.cursor() as cur:
-                cur.execute(self.DELETE_USERS)
-            
-            conn.commit()
+            with self.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(self.DELETE_USERS)
+                
+                conn.commit()
+            self.clear_user_ids_cache()
             
         except Exception as e:
             print(e)
-            conn.rollback()
-        finally:
-            conn.close()
+
+    def _partition_name(self, table, day):
+        # Nombre de la partición diaria: <tabla>_pAAAAMMDD
+        return f"{table}_p{day:%Y%m%d}"
+
+    def _default_partition_name(self, table):
+        # Partición por defecto creada por el script de la base de datos
+        return f"{table}_default"
+
+    def _partition_day(self, table, partition):
+        # Día de una partición a partir de su nombre (None si no sigue el formato)
+        try:
+            return datetime.strptime(partition, f"{table}_p%Y%m%d").date()
+        except ValueError:
+            return None
+
+    def maintain_partitions(self, days, oldest_day):
+        # Crea las particiones diarias (UTC) de 'days' que falten y borra las anteriores a oldest_day
+        # (None: sin retención). Borrar una partición es inmediato, al contrario que un DELETE del histórico.
+        # Las filas que hayan caído en la partición por defecto se mueven a la partición de su día.
+        created = []
+        dropped = []
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self.LOCK_PARTITIONS)
+                for table in self.PARTITIONED_TABLES:
+                    cur.execute(self.LIST_PARTITIONS, (table,))
+                    existing = {row[0] for row in cur.fetchall()}
+
+                    default_partition = self._default_partition_name(table)
+                    default_days = set()
+                    if default_partition in existing:
+                        cur.execute(self.LIST_DEFAULT_PARTITION_DAYS.format(
+                            partition=sql.Identifier("tfm_ips", default_partition)))
+                        default_days = {row[0] for row in cur.fetchall()}
+                        if oldest_day is not None:
+                            # Las filas caducadas de la partición por defecto se borran sin crear su partición
+                            cur.execute(self.DELETE_FROM_DEFAULT_PARTITION.format(
+                                partition=sql.Identifier("tfm_ips", default_partition),
+                                end=sql.Literal(datetime.combine(oldest_day, dt_time(), tzinfo=ZoneInfo("UTC")))
+                            ))
+                            default_days = {day for day in default_days if day >= oldest_day}
+
+                    for day in sorted(set(days) | default_days):
+                        partition = self._partition_name(table, day)
+                        if partition in existing:
+                            continue
+                        start = datetime.combine(day, dt_time(), tzinfo=ZoneInfo("UTC"))
+                        bounds = {"start": sql.Literal(start), "end": sql.Literal(start + timedelta(days=1))}
+                        if day in default_days:
+                            cur.execute(self.MOVE_OUT_OF_DEFAULT_PARTITION.format(
+                                partition=sql.Identifier("tfm_ips", default_partition), **bounds))
+                        cur.execute(self.CREATE_PARTITION.format(
+                            partition=sql.Identifier("tfm_ips", partition),
+                            table=sql.Identifier("tfm_ips", table),
+                            **bounds
+                        ))
+                        if day in default_days:
+                            cur.execute(self.MOVE_INTO_PARTITION.format(table=sql.Identifier("tfm_ips", table)))
+                        created.append(partition)
+
+                    if oldest_day is None:
+                        continue
+                    for partition in sorted(existing):
+                        day = self._partition_day(table, partition)
+                        if day is not None and day < oldest_day:
+                            cur.execute(self.DROP_PARTITION.format(partition=sql.Identifier("tfm_ips", partition)))
+                            dropped.append(partition)
+
+            conn.commit()
+
+        return created, dropped
\ No newline at end of file
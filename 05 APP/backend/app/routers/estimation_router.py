@@ -1,9 +1,14 @@
-from fastapi import APIRouter
+import secrets
+from fastapi import APIRouter, HTTPException, Header
+from typing import List
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from services.knn_service import KNNService
+from services.knn_service import KNNService, ReloadInProgressError
 from services.user_position_service import UserPositionService
 from services.date_service import DateService
+from services.estimation_batcher import EstimationBatcher
+from services.write_behind_buffer import WriteBehindBuffer
+from services.executor_service import ExecutorService
 from models.estimate_position_request import EstimatePositionRequest
 from config.config import Config
 from repositories.database_repo import Database
@@ -14,18 +19,90 @@ knn_service = KNNService()
 user_position_service = UserPositionService()
 current_timezone = ZoneInfo(config.timezone)
 date_service = DateService()
+executor_service = ExecutorService()
+
+# Agrupación de peticiones concurrentes en una única predicción (opcional)
+batcher_conf = config.estimation_batcher
+estimation_batcher = None
+if batcher_conf.get("enabled", False):
+    estimation_batcher = EstimationBatcher(
+        knn_service,
+        max_batch_size=batcher_conf.get("max_batch_size", 32),
+        max_wait_ms=batcher_conf.get("max_wait_ms", 5)
+    )
+
+# Escritura diferida del histórico de posiciones (opcional)
+write_behind_conf = config.write_behind
+write_behind_buffer = None
+if write_behind_conf.get("enabled", False):
+    write_behind_buffer = WriteBehindBuffer(
+        user_position_service,
+        max_batch_size=write_behind_conf.get("max_batch_size", 5000),
+        flush_interval_ms=write_behind_conf.get("flush_interval_ms", 200),
+        max_queue_size=write_behind_conf.get("max_queue_size", 10000)
+    )
 
 @estimation_router.post("/estimate-position")
 async def estimate_position(request: EstimatePositionRequest):
     # Realiza la estimación de la posición y lo devuelve en la respuesta
     current_system_timestamp = date_service.get_current_date_utc()
 
-    position = knn_service.estimate_2d_floor(request)
+    if estimation_batcher is not None:
+        position = await estimation_batcher.estimate(request)
+    else:
+        position = await executor_service.run_inference(knn_service.estimate_2d_floor, request)
     position["device_name"] = request.device_name
     position["currentTimestamp"] = current_system_timestamp
     
-    user_position_service.update_user_info(position,request.wifi_measurements)
+    if write_behind_buffer is not None:
+        await write_behind_buffer.add(position, request.wifi_measurements)
+    else:
+        await user_position_service.update_user_info(position, request.wifi_measurements)
     
     position["currentTimestamp"] = current_system_timestamp.astimezone(current_timezone).isoformat()
     
-    return position
\ No newline at end of file
+    return position
+
+@estimation_router.post("/estimate-positions-batch")
+async def estimate_positions_batch(requests: List[EstimatePositionRequest]):
+    # Realiza la estimación de un lote de posiciones con una única predicción y las guarda en una transacción
+    # Un lote vacío no necesita estimación ni acceso a la base de datos
+    if not requests:
+        return []
+
+    current_system_timestamp = date_service.get_current_date_utc()
+
+    positions = await executor_service.run_inference(knn_service.estimate_2d_floor_batch, requests)
+    for position, request in zip(positions, requests):
+        position["device_name"] = request.device_name
+        position["currentTimestamp"] = current_system_timestamp
+
+    users_info = [(position, request.wifi_measurements) for position, request in zip(positions, requests)]
+    if write_behind_buffer is not None:
+        await write_behind_buffer.add_many(users_info)
+    else:
+        await user_position_service.update_users_info(users_info)
+
+    for position in positions:
+        position["currentTimestamp"] = current_system_timestamp.astimezone(current_timezone).isoformat()
+
+    return positions
+
+@estimation_router.post("/reload-models")
+async def reload_models(x_reload_token: str | None = Header(default=None)):
+    # Recarga los modelos KNN desde disco sin reiniciar el servicio.
+    # Requiere la cabecera X-Reload-Token con el token de model_reload; sin token configurado está desactivado
+    reload_token = config.model_reload.get("token", "")
+    if not reload_token:
+        raise HTTPException(status_code=403, detail="Model reload is disabled")
+    if x_reload_token is None or not secrets.compare_digest(x_reload_token, reload_token):
+        raise HTTPException(status_code=401, detail="Invalid reload token")
+
+    try:
+        reload_ms = await executor_service.run_io(knn_service.reload)
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {e}")
+
+    return {"reloadMilliseconds": reload_ms}
\ No newline at end of file
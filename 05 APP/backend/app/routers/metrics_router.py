@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from services.metrics_service import MetricsService
+
+metrics_router = APIRouter()
+metrics_service = MetricsService()
+
+@metrics_router.get("/")
+async def get_metrics():
+    # Devuelve los contadores y resúmenes de métricas del proceso
+    return metrics_service.snapshot()
\ No newline at end of file
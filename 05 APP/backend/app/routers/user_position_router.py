@@ -1,5 +1,10 @@
+import asyncio
+from typing import Optional
 from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from services.user_position_service import UserPositionService
+from services.position_broadcaster import PositionBroadcaster
 from services.date_service import DateService
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -10,21 +15,62 @@ user_positions_router = APIRouter()
 user_service = UserPositionService()
 current_timezone = ZoneInfo(config.timezone)
 date_service = DateService()
+position_broadcaster = PositionBroadcaster()
+keepalive_seconds = config.position_stream.get("keepalive_seconds", 15)
 
 @user_positions_router.get("/user-positions")
-async def get_user_positions():
-    # Devuelve las últimas posiciones conocidas de las personas
+async def get_user_positions(since: Optional[int] = None):
+    # Devuelve las últimas posiciones conocidas de las personas. Con 'since' (el 'cursor' de la
+    # respuesta anterior) solo las que han cambiado desde entonces, que pueden incluir alguna repetida.
+    # Si desde entonces se han borrado personas (clear-user-positions) la respuesta trae todas las
+    # posiciones con "reset": true y el cliente debe sustituir su lista en lugar de actualizarla.
+    # Una transacción larga en la base de datos frena el cursor (ver GET_USERS_POSITIONS_CURSOR).
     current_system_timestamp = date_service.get_current_date_utc().astimezone(current_timezone)
-    users = user_service.get_users_positions()
+    cursor, reset, users = await user_service.get_users_positions_since(since)
     for user in users:
         user.lastUpdateInSeconds = (current_system_timestamp - user.lastUpdateTimestamp).total_seconds()
     
     return {
         "systemTimestamp": current_system_timestamp,
+        "cursor": cursor,
+        "reset": reset,
         "users": users
     }
 
 @user_positions_router.get("/clear-user-positions")
 async def clear_user_positions():
     # Borra los datos la base de datos de ubicaciones online
-    users = user_service.clear_users_positions()
\ No newline at end of file
+    await user_service.clear_users_positions()
+
+async def _snapshot_event():
+    # Foto completa de las últimas posiciones desde la base de datos
+    current_system_timestamp = date_service.get_current_date_utc().astimezone(current_timezone)
+    users = await user_service.get_users_positions()
+    return position_broadcaster.snapshot_event(current_system_timestamp.isoformat(), jsonable_encoder(users))
+
+@user_positions_router.get("/user-positions/stream")
+async def stream_user_positions():
+    # Stream (Server-Sent Events) de posiciones: una foto completa al conectar y después
+    # las posiciones nuevas según se guardan, sin consultar la base de datos en cada actualización
+    queue = position_broadcaster.subscribe()
+
+    async def events():
+        try:
+            yield await _snapshot_event()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield position_broadcaster.keepalive_event()
+                    continue
+                if message == position_broadcaster.CLOSE:
+                    return
+                if message == position_broadcaster.RESYNC:
+                    # El cliente no ha consumido a tiempo sus mensajes: se le envía de nuevo la foto completa
+                    yield await _snapshot_event()
+                    continue
+                yield message
+        finally:
+            position_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
\ No newline at end of file
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from models.estimate_position_request import EstimatePositionRequest
+from services.metrics_service import MetricsService
+from services.executor_service import ExecutorService
+
+class EstimationBatcher:
+    # Agrupa las peticiones concurrentes de estimación en una única predicción vectorizada
+
+    def __init__(self, knn_service, max_batch_size=32, max_wait_ms=5):
+        self.knn_service = knn_service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = MetricsService()
+        self.executor = ExecutorService()
+        self._queue = None
+        self._task = None
+
+    def _start(self):
+        # Arranca la tarea de agrupación en el bucle de eventos actual
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def estimate(self, request: EstimatePositionRequest):
+        # Encola la petición y espera a que se resuelva su lote
+        if self._task is None or self._task.done():
+            self._start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self):
+        # Espera la primera petición y agrupa las siguientes hasta llenar el lote o agotar la ventana
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+
+            # Métricas de tamaño de lote y tiempo de espera en cola
+            start = time.perf_counter()
+            self.metrics.observe("estimation_batcher.batch_size", len(batch))
+            for _, _, enqueued in batch:
+                self.metrics.observe("estimation_batcher.queue_wait_ms", (start - enqueued) * 1000)
+
+            try:
+                results = await self._predict([request for request, _, _ in batch])
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.metrics.observe("estimation_batcher.predict_ms", (time.perf_counter() - start) * 1000)
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _predict(self, requests):
+        # Una única predicción para todo el lote, fuera del bucle de eventos
+        return await self.executor.run_inference(self.knn_service.estimate_2d_floor_batch, requests)
+
+    async def stop(self):
+        # Detiene la tarea de agrupación y cancela las peticiones pendientes
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
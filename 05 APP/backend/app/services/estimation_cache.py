@@ -0,0 +1,68 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from services.metrics_service import MetricsService
+
+class EstimationCache:
+    # Caché LRU con caducidad de estimaciones indexada por la huella WIFI.
+    # Los dispositivos parados envían escaneos idénticos o casi idénticos y reutilizan la misma estimación.
+    # Con rssi_bucket = 0 la clave usa el RSSI exacto y solo se reutilizan estimaciones de escaneos iguales.
+    # Con rssi_bucket > 0 los RSSI se agrupan en intervalos de ese tamaño (dB): hay más aciertos, pero
+    # escaneos distintos del mismo intervalo comparten la estimación del primero (es una aproximación)
+
+    def __init__(self, max_size=4096, ttl_seconds=5, rssi_bucket=0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.rssi_bucket = rssi_bucket
+        self.metrics = MetricsService()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Se incrementa al vaciar la caché; descarta resultados calculados con modelos anteriores
+        self.generation = 0
+
+    def key(self, wifi_fingerprints):
+        # Clave canónica: BSSID ordenados con su RSSI exacto o agrupado en intervalos de rssi_bucket dB
+        if not self.rssi_bucket:
+            return tuple(sorted(wifi_fingerprints.items()))
+        return tuple(sorted((bssid, math.floor(rssi / self.rssi_bucket)) for bssid, rssi in wifi_fingerprints.items()))
+
+    def get(self, key):
+        # Devuelve una copia de la estimación guardada o None si no existe o ha caducado
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            self.metrics.increment("estimation_cache.misses")
+            return None
+        self.metrics.increment("estimation_cache.hits")
+        return dict(entry[0])
+
+    def put(self, key, result, generation):
+        # Guarda la estimación si se calculó con los modelos actuales
+        evicted = 0
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (dict(result), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+            size = len(self._entries)
+
+        if evicted:
+            self.metrics.increment("estimation_cache.evictions", evicted)
+        self.metrics.set_gauge("estimation_cache.size", size)
+
+    def clear(self):
+        # Vacía la caché (por ejemplo al recargar los modelos)
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+        self.metrics.set_gauge("estimation_cache.size", 0)
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from config.config import Config
+
+class ExecutorService:
+    # Pools de hilos acotados para sacar del bucle de eventos el trabajo bloqueante
+    config = Config()
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            executors_conf = cls.config.executors
+            # Inferencia KNN (CPU): pocos hilos, NumPy libera el GIL en las operaciones pesadas
+            cls._instance.inference_executor = ThreadPoolExecutor(
+                max_workers=executors_conf.get("inference_workers", 2), thread_name_prefix="inference")
+            # Accesos a base de datos (E/S)
+            cls._instance.io_executor = ThreadPoolExecutor(
+                max_workers=executors_conf.get("io_workers", 8), thread_name_prefix="io")
+        return cls._instance
+
+    async def run_inference(self, fn, *args):
+        # Ejecuta una función de inferencia en el pool de CPU
+        return await asyncio.get_running_loop().run_in_executor(self.inference_executor, partial(fn, *args))
+
+    async def run_io(self, fn, *args):
+        # Ejecuta una función de base de datos en el pool de E/S
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, partial(fn, *args))
+
+    def shutdown(self):
+        # Espera a que terminen las tareas pendientes y libera los hilos
+        self.inference_executor.shutdown(wait=True)
+        self.io_executor.shutdown(wait=True)
@@ -0,0 +1,60 @@
+import numpy as np
+from typing import Dict, List
+
+class FingerprintEncoder:
+    # Valor RSSI con el que se rellenan los puntos de acceso no detectados
+    MISSING_RSSI = -120
+
+    def __init__(self, columns: List[str], mean=None, scale=None):
+        # Mapa BSSID -> índice de columna
+        self.column_index = {bssid: index for index, bssid in enumerate(columns)}
+        self.n_columns = len(columns)
+
+        # Estadísticas del StandardScaler (None si no se centra o no se escala)
+        self.mean = np.asarray(mean, dtype=np.float64) if mean is not None else None
+        self.scale = np.asarray(scale, dtype=np.float64) if scale is not None else None
+
+        # Vector base ya escalado con todos los puntos de acceso a -120
+        self.baseline = self._scale(np.full(self.n_columns, self.MISSING_RSSI, dtype=np.float64), slice(None))
+
+    @classmethod
+    def from_scaler(cls, columns: List[str], scaler):
+        # Crea el codificador a partir de un StandardScaler entrenado
+        return cls(columns,
+                   scaler.mean_ if scaler.with_mean else None,
+                   scaler.scale_ if scaler.with_std else None)
+
+    def _scale(self, values, indices):
+        # Aplica la misma transformación que StandardScaler.transform: (X - mean) / scale
+        if self.mean is not None:
+            values -= self.mean[indices]
+        if self.scale is not None:
+            values /= self.scale[indices]
+        return values
+
+    def _fill_row(self, row, wifi_fingerprints: Dict[str, float]):
+        # Escala solo las columnas detectadas sobre una fila que ya contiene el vector base
+        indices = []
+        values = []
+        for bssid, rssi in wifi_fingerprints.items():
+            index = self.column_index.get(bssid)
+            if index is not None:
+                indices.append(index)
+                values.append(rssi)
+
+        if indices:
+            indices = np.asarray(indices, dtype=np.intp)
+            row[indices] = self._scale(np.asarray(values, dtype=np.float64), indices)
+
+    def encode(self, wifi_fingerprints: Dict[str, float]):
+        # Devuelve una matriz (1, n_columnas) escalada lista para el modelo KNN
+        X_scaled = self.baseline.copy()[np.newaxis, :]
+        self._fill_row(X_scaled[0], wifi_fingerprints)
+        return X_scaled
+
+    def encode_many(self, wifi_fingerprints_list: List[Dict[str, float]]):
+        # Devuelve una matriz (n_escaneos, n_columnas) escalada, una fila por escaneo
+        X_scaled = np.tile(self.baseline, (len(wifi_fingerprints_list), 1))
+        for row, wifi_fingerprints in zip(X_scaled, wifi_fingerprints_list):
+            self._fill_row(row, wifi_fingerprints)
+        return X_scaled
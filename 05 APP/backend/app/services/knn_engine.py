@@ -0,0 +1,191 @@
+import threading
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+# Nombres con los que sklearn identifica la distancia Manhattan
+MANHATTAN_METRICS = ("manhattan", "cityblock", "l1")
+
+class BruteForceNeighbors:
+    # Búsqueda exacta de vecinos (distancia Manhattan) sobre una matriz de referencia contigua y compacta
+
+    def __init__(self, fit_X, dtype="float32"):
+        self.fit_X = np.ascontiguousarray(fit_X, dtype=dtype)
+        self.n_samples = self.fit_X.shape[0]
+        # Vector de unos para sumar |x - fit_X| por filas con un producto matriz-vector (BLAS)
+        self.ones = np.ones(self.fit_X.shape[1], dtype=self.fit_X.dtype)
+        # Matriz auxiliar |x - fit_X| reutilizada por cada hilo para no reservar memoria en cada consulta
+        self._local = threading.local()
+
+    def _buffer(self):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty_like(self.fit_X)
+        return buffer
+
+    def _distances(self, x, buffer):
+        # Distancias L1 de x a todas las filas de referencia
+        np.subtract(self.fit_X, x, out=buffer)
+        np.abs(buffer, out=buffer)
+        return buffer @ self.ones
+
+    def kneighbors(self, X, n_neighbors):
+        # Devuelve (distancias, índices) de los n_neighbors vecinos de cada fila de X, ordenados
+        X = np.asarray(X, dtype=self.fit_X.dtype)
+        n_neighbors = min(n_neighbors, self.n_samples)
+        distances = np.empty((X.shape[0], n_neighbors), dtype=np.float64)
+        indices = np.empty((X.shape[0], n_neighbors), dtype=np.intp)
+        buffer = self._buffer()
+
+        for i, x in enumerate(X):
+            row_distances = self._distances(x, buffer)
+            # Los k menores sin ordenar todo el vector y después se ordenan solo esos k
+            if n_neighbors < self.n_samples:
+                top = np.argpartition(row_distances, n_neighbors - 1)[:n_neighbors]
+            else:
+                top = np.arange(self.n_samples)
+            order = top[np.argsort(row_distances[top], kind="stable")]
+            indices[i] = order
+            distances[i] = row_distances[order]
+
+        return distances, indices
+
+class InvertedIndexNeighbors:
+    # Búsqueda exacta de vecinos (distancia Manhattan) con un índice invertido BSSID -> filas de referencia.
+    # Una fila que no escuchó ningún AP del escaneo está a distancia "base + hueco del escaneo",
+    # así que solo se calcula la distancia exacta de las filas candidatas.
+
+    def __init__(self, fit_X, baseline):
+        self.fit_X = np.ascontiguousarray(fit_X, dtype=np.float64)
+        self.baseline = np.asarray(baseline, dtype=np.float64)
+        self.n_samples = self.fit_X.shape[0]
+
+        # Distancia de cada fila al escaneo "todo -120"
+        self.baseline_distance = np.abs(self.fit_X - self.baseline).sum(axis=1)
+        # Filas ordenadas por distancia base, para elegir los mejores no candidatos
+        self.rows_by_baseline_distance = np.argsort(self.baseline_distance, kind="stable")
+
+        # Índice invertido: columna (BSSID) -> filas en las que se escuchó ese AP
+        heard = self.fit_X != self.baseline
+        self.rows_by_column = [np.flatnonzero(heard[:, column]) for column in range(self.fit_X.shape[1])]
+
+    def _kneighbors_row(self, x, n_neighbors):
+        # Columnas escuchadas en el escaneo
+        columns = np.flatnonzero(x != self.baseline)
+        x_heard = x[columns]
+        query_gap = np.abs(x_heard - self.baseline[columns]).sum()
+
+        # Filas candidatas: las que escucharon algún AP del escaneo
+        is_candidate = np.zeros(self.n_samples, dtype=bool)
+        for column in columns:
+            is_candidate[self.rows_by_column[column]] = True
+        candidates = np.flatnonzero(is_candidate)
+
+        # Distancia exacta de las candidatas corrigiendo solo las columnas escuchadas en el escaneo
+        candidate_values = self.fit_X[candidates[:, np.newaxis], columns]
+        candidate_gap = (np.abs(candidate_values - x_heard)
+                         - np.abs(candidate_values - self.baseline[columns])).sum(axis=1)
+        candidate_distances = self.baseline_distance[candidates] + candidate_gap
+
+        # Mejores filas no candidatas: su distancia es la distancia base más el hueco del escaneo.
+        # Entre las primeras k + n_candidatas filas por distancia base hay al menos k no candidatas.
+        head = self.rows_by_baseline_distance[:n_neighbors + candidates.size]
+        others = head[~is_candidate[head]][:n_neighbors]
+        other_distances = self.baseline_distance[others] + query_gap
+
+        # Unir ambos grupos y quedarse con los k más cercanos
+        rows = np.concatenate([candidates, others])
+        distances = np.concatenate([candidate_distances, other_distances])
+        order = np.argsort(distances, kind="stable")[:n_neighbors]
+        return distances[order], rows[order]
+
+    def kneighbors(self, X, n_neighbors):
+        # Devuelve (distancias, índices) de los n_neighbors vecinos de cada fila de X, ordenados
+        X = np.asarray(X, dtype=np.float64)
+        n_neighbors = min(n_neighbors, self.n_samples)
+        distances = np.empty((X.shape[0], n_neighbors), dtype=np.float64)
+        indices = np.empty((X.shape[0], n_neighbors), dtype=np.intp)
+        for i, x in enumerate(X):
+            distances[i], indices[i] = self._kneighbors_row(x, n_neighbors)
+        return distances, indices
+
+def _get_weights(distances, weights):
+    # Pesos de los vecinos igual que sklearn: None (uniforme) o 1/distancia
+    if weights == "uniform":
+        return None
+    with np.errstate(divide="ignore"):
+        inverse = 1.0 / distances
+    # Si algún vecino está a distancia 0 solo cuentan los que están a distancia 0
+    zero_rows = np.isinf(inverse).any(axis=1)
+    inverse[zero_rows] = np.isinf(inverse[zero_rows]).astype(np.float64)
+    return inverse
+
+class KNNRegressor:
+    # Regresión KNN sobre un buscador de vecinos (equivalente a KNeighborsRegressor.predict)
+
+    def __init__(self, neighbors, y, n_neighbors, weights="uniform"):
+        self.neighbors = neighbors
+        self.y = np.asarray(y, dtype=np.float64)
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+
+    def aggregate(self, distances, indices):
+        # Media (o media ponderada) de las etiquetas de los n_neighbors primeros vecinos
+        distances = distances[:, :self.n_neighbors]
+        indices = indices[:, :self.n_neighbors]
+        weights = _get_weights(distances, self.weights)
+        if weights is None:
+            return np.mean(self.y[indices], axis=1)
+        if self.y.ndim == 1:
+            return np.sum(self.y[indices] * weights, axis=1) / np.sum(weights, axis=1)
+        return np.sum(self.y[indices] * weights[:, :, np.newaxis], axis=1) / np.sum(weights, axis=1)[:, np.newaxis]
+
+    def predict(self, X):
+        distances, indices = self.neighbors.kneighbors(X, self.n_neighbors)
+        return self.aggregate(distances, indices)
+
+class KNNClassifier:
+    # Clasificación KNN sobre un buscador de vecinos (equivalente a KNeighborsClassifier.predict)
+
+    def __init__(self, neighbors, y, n_neighbors, weights="uniform"):
+        self.neighbors = neighbors
+        # Etiquetas codificadas como índices de clase; en empate gana la clase menor
+        self.classes, self.codes = np.unique(np.asarray(y), return_inverse=True)
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+
+    def aggregate(self, distances, indices):
+        # Votación (o votación ponderada) de los n_neighbors primeros vecinos
+        distances = distances[:, :self.n_neighbors]
+        codes = self.codes[indices[:, :self.n_neighbors]]
+        weights = _get_weights(distances, self.weights)
+        if weights is None:
+            weights = np.ones(codes.shape, dtype=np.float64)
+        votes = np.zeros((codes.shape[0], len(self.classes)), dtype=np.float64)
+        np.add.at(votes, (np.arange(codes.shape[0])[:, np.newaxis], codes), weights)
+        return self.classes[np.argmax(votes, axis=1)]
+
+    def predict(self, X):
+        distances, indices = self.neighbors.kneighbors(X, self.n_neighbors)
+        return self.aggregate(distances, indices)
+
+def build_neighbors(fit_X, baseline, backend, dtype="float32", metric="manhattan"):
+    # Crea el buscador de vecinos configurado. Con 'sklearn' o una métrica distinta de Manhattan
+    # se usa NearestNeighbors, que ofrece el mismo kneighbors(X, n_neighbors)
+    if backend == "sklearn" or metric not in MANHATTAN_METRICS:
+        return NearestNeighbors(metric=metric).fit(fit_X)
+    if backend == "brute_force":
+        return BruteForceNeighbors(fit_X, dtype)
+    if backend == "inverted_index":
+        return InvertedIndexNeighbors(fit_X, baseline)
+    raise ValueError(f"Unknown KNN engine backend '{backend}'")
+
+def from_sklearn(knn, baseline, backend, dtype="float32"):
+    # Sustituye un KNeighborsRegressor/KNeighborsClassifier de sklearn por el motor propio.
+    # Si el motor es 'sklearn' o la métrica no es Manhattan se devuelve el modelo original.
+    if backend == "sklearn" or knn.effective_metric_ not in MANHATTAN_METRICS:
+        return knn
+
+    neighbors = build_neighbors(knn._fit_X, baseline, backend, dtype)
+    if hasattr(knn, "classes_"):
+        return KNNClassifier(neighbors, knn.classes_[knn._y], knn.n_neighbors, knn.weights)
+    return KNNRegressor(neighbors, knn._y, knn.n_neighbors, knn.weights)
@@ -1,56 +1,226 @@
+import threading
+import time
 import joblib
 import pandas as pd
 import numpy as np
 from config.config import Config
-from typing import Dict
+from typing import Dict, List
 from models.estimate_position_request import EstimatePositionRequest
+from services.fingerprint_encoder import FingerprintEncoder
+from services.knn_engine import KNNRegressor, KNNClassifier, MANHATTAN_METRICS, build_neighbors, from_sklearn
+from services.model_artifact import ModelArtifact
+from services.metrics_service import MetricsService
+from services.estimation_cache import EstimationCache
 
-class KNNService:
-    # Cargar configuración de modelos
-    config = Config()
+class ReloadInProgressError(Exception):
+    # Ya hay una recarga de modelos en curso
+    pass
+
+class KNNModels:
+    # Conjunto de modelos cargados. Es inmutable una vez creado: una recarga crea otro conjunto
+    # y lo sustituye entero, así que cada petición trabaja siempre con los mismos modelos.
+
+    def __init__(self, config: Config):
+        # Motor de búsqueda de vecinos: 'sklearn', 'brute_force' o 'inverted_index'
+        self.backend = config.knn_engine.get("backend", "sklearn")
+        # Tipo de la matriz de referencia del motor 'brute_force'
+        self.dtype = config.knn_engine.get("dtype", "float32")
 
-    def __init__(self):
         # Modelos 2D
-        models_2d = self.config.models_2d
-        self.knn_2d = joblib.load(models_2d["knn"])
-        self.scaler_2d = joblib.load(models_2d["scaler"])
-        self.columns_2d = pd.read_csv(models_2d["columns"], header=None).values.flatten().tolist()
+        self.encoder_2d, self.knn_2d = self._load_model(config.models_2d)
 
         # Modelos Floor Detection
-        models_fd = self.config.models_fd
-        self.knn_floor = joblib.load(models_fd["knn"])
-        self.scaler_floor = joblib.load(models_fd["scaler"])
-        self.columns_floor = pd.read_csv(models_fd["columns"], header=None).values.flatten().tolist()
-
-    def _prepare_input(self, wifi_fingerprints: Dict[str, float], columns: list, scaler):
-        # Rellena las columnas que faltan con -120 y escala con el scaler.
-        X_df = pd.DataFrame([wifi_fingerprints])
-        X_df = X_df.reindex(columns=columns, fill_value=-120)
-        X_scaled = scaler.transform(X_df)
-        return X_scaled
-
-    def estimate_2d(self, wifi_fingerprints: Dict[str, float]):
+        self.encoder_floor, self.knn_floor = self._load_model(config.models_fd)
+
+        # Modelo conjunto 2D + Floor Detection (opcional, desactivado por defecto)
+        self.use_joint_model = False
+        models_joint = config.models_joint
+        if models_joint.get("enabled", False):
+            self._load_joint_model(models_joint)
+            self.use_joint_model = True
+
+    def _read_columns(self, path):
+        return pd.read_csv(path, header=None).values.flatten().tolist()
+
+    def _artifact(self, models_conf):
+        # Formato plano con mmap solo si está configurado ('artifact') y la carpeta tiene su manifest.json.
+        # Si no, se usan los ficheros joblib
+        folder = models_conf.get("artifact")
+        if folder is None:
+            return None
+        if not ModelArtifact.exists(folder):
+            print(f"Model artifact not found in '{folder}', loading joblib files")
+            return None
+        return ModelArtifact(folder)
+
+    def _load_model(self, models_conf):
+        artifact = self._artifact(models_conf)
+        if artifact is not None:
+            encoder = artifact.encoder()
+            return encoder, artifact.model(encoder.baseline, self.backend, self.dtype)
+
+        knn = joblib.load(models_conf["knn"])
+        scaler = joblib.load(models_conf["scaler"])
+        encoder = FingerprintEncoder.from_scaler(self._read_columns(models_conf["columns"]), scaler)
+        return encoder, from_sklearn(knn, encoder.baseline, self.backend, self.dtype)
+
+    def _load_joint_model(self, models_conf):
+        # Un único buscador de vecinos compartido por la regresión 2D y la votación de planta
+        artifact = self._artifact(models_conf)
+        if artifact is not None:
+            self.encoder_joint = artifact.encoder()
+            self.neighbors_joint, self.knn_joint_2d, self.knn_joint_floor = artifact.joint_model(
+                self.encoder_joint.baseline, self.backend, self.dtype)
+            return
+
+        knn_joint = joblib.load(models_conf["knn"])
+        scaler = joblib.load(models_conf["scaler"])
+        self.encoder_joint = FingerprintEncoder.from_scaler(self._read_columns(models_conf["columns"]), scaler)
+
+        neighbors = knn_joint["neighbors"]
+        if self.backend != "sklearn" and neighbors.effective_metric_ in MANHATTAN_METRICS:
+            neighbors = build_neighbors(neighbors._fit_X, self.encoder_joint.baseline, self.backend, self.dtype)
+        self.neighbors_joint = neighbors
+        self.knn_joint_2d = KNNRegressor(neighbors, knn_joint["positions"], knn_joint["n_neighbors_2d"],
+                                         knn_joint.get("weights_2d", "uniform"))
+        self.knn_joint_floor = KNNClassifier(neighbors, knn_joint["floors"], knn_joint["n_neighbors_floor"],
+                                             knn_joint.get("weights_floor", "uniform"))
+
+    def _prepare_input(self, wifi_fingerprints_list: List[Dict[str, float]], encoder: FingerprintEncoder):
+        # Rellena las columnas que faltan con -120 y escala con los parámetros del scaler.
+        return encoder.encode_many(wifi_fingerprints_list)
+
+    def estimate_2d(self, wifi_fingerprints_list: List[Dict[str, float]]):
         # Estima latitud y longitud usando KNN 2D.
-        X_scaled = self._prepare_input(wifi_fingerprints, self.columns_2d, self.scaler_2d)
-        position = self.knn_2d.predict(X_scaled)[0]
-        return {"latitude": float(position[0]), "longitude": float(position[1])}
+        X_scaled = self._prepare_input(wifi_fingerprints_list, self.encoder_2d)
+        positions = self.knn_2d.predict(X_scaled)
+        return [{"latitude": float(position[0]), "longitude": float(position[1])} for position in positions]
 
-    def estimate_floor(self, wifi_fingerprints: Dict[str, float]):
+    def estimate_floor(self, wifi_fingerprints_list: List[Dict[str, float]]):
         # Estima la planta usando KNN Floor Detection.
-        X_scaled = self._prepare_input(wifi_fingerprints, self.columns_floor, self.scaler_floor)
-        floor_id = self.knn_floor.predict(X_scaled)[0]
-        return {"floorId": int(floor_id)}
+        X_scaled = self._prepare_input(wifi_fingerprints_list, self.encoder_floor)
+        floor_ids = self.knn_floor.predict(X_scaled)
+        return [{"floorId": int(floor_id)} for floor_id in floor_ids]
 
-    def estimate_2d_floor(self, request: EstimatePositionRequest):
-        # Recibe un EstimatePositionRequest y devuelve latitud, longitud y floorId.
-        # Convertir lista de WifiMeasurement a diccionario {mac_bssid: rssi}
-        sorted_measurements = sorted(request.wifi_measurements, key=lambda measurement: measurement.mac_bssid)
-        wifi_dict = {measurement.mac_bssid: measurement.rssi for measurement in sorted_measurements}
+    def estimate_joint(self, wifi_fingerprints_list: List[Dict[str, float]]):
+        # Estima latitud, longitud y planta con una única búsqueda de vecinos.
+        X_scaled = self._prepare_input(wifi_fingerprints_list, self.encoder_joint)
+        # Vecinos ordenados por distancia con el mayor k de los dos modelos
+        n_neighbors = max(self.knn_joint_2d.n_neighbors, self.knn_joint_floor.n_neighbors)
+        distances, indices = self.neighbors_joint.kneighbors(X_scaled, n_neighbors)
+
+        # Regresión 2D con los n_neighbors_2d primeros vecinos y votación de planta con los n_neighbors_floor primeros
+        positions = self.knn_joint_2d.aggregate(distances, indices)
+        floor_ids = self.knn_joint_floor.aggregate(distances, indices)
+
+        return [
+            {"latitude": float(position[0]), "longitude": float(position[1]), "floorId": int(floor_id)}
+            for position, floor_id in zip(positions, floor_ids)
+        ]
+
+    def estimate(self, wifi_fingerprints_list: List[Dict[str, float]]):
+        # Estimación con el modelo conjunto si está configurado
+        if self.use_joint_model:
+            return self.estimate_joint(wifi_fingerprints_list)
 
         # Estimaciones
-        position_2d = self.estimate_2d(wifi_dict)
-        floor = self.estimate_floor(wifi_dict)
+        positions_2d = self.estimate_2d(wifi_fingerprints_list)
+        floors = self.estimate_floor(wifi_fingerprints_list)
 
         # Combinar resultados
-        result = {**position_2d, **floor}
-        return result
\ No newline at end of file
+        return [{**position_2d, **floor} for position_2d, floor in zip(positions_2d, floors)]
+
+    def validate(self):
+        # Comprueba que los modelos son coherentes y devuelven estimaciones válidas
+        encoders = [self.encoder_2d, self.encoder_floor] + ([self.encoder_joint] if self.use_joint_model else [])
+        for encoder in encoders:
+            if encoder.n_columns == 0:
+                raise ValueError("Model has no WIFI columns")
+            if encoder.baseline.shape[0] != encoder.n_columns or not np.all(np.isfinite(encoder.baseline)):
+                raise ValueError("Invalid scaler statistics")
+
+        # Un escaneo vacío y uno con un punto de acceso conocido
+        some_bssid = next(iter(self.encoder_2d.column_index))
+        for result in self.estimate([{}, {some_bssid: -60.0}]):
+            if not (np.isfinite(result["latitude"]) and np.isfinite(result["longitude"])):
+                raise ValueError("Model returned a non finite position")
+
+class KNNService:
+    # Cargar configuración de modelos
+    config = Config()
+
+    def __init__(self):
+        self.models = KNNModels(self.config)
+        self.metrics = MetricsService()
+        self._reload_lock = threading.Lock()
+
+        # Caché de estimaciones por huella WIFI (opcional)
+        self.cache = None
+        cache_conf = self.config.estimation_cache
+        if cache_conf.get("enabled", False):
+            self.cache = EstimationCache(
+                max_size=cache_conf.get("max_size", 4096),
+                ttl_seconds=cache_conf.get("ttl_seconds", 5),
+                rssi_bucket=cache_conf.get("rssi_bucket", 0)
+            )
+
+    def reload(self):
+        # Carga y valida un nuevo conjunto de modelos y lo sustituye de forma atómica.
+        # Las peticiones en curso terminan con los modelos anteriores.
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("A model reload is already in progress")
+        try:
+            start = time.perf_counter()
+            try:
+                models = KNNModels(self.config)
+                models.validate()
+            except Exception:
+                self.metrics.increment("knn_service.reload_failures")
+                raise
+            self.models = models
+            # Las estimaciones guardadas corresponden a los modelos anteriores
+            if self.cache is not None:
+                self.cache.clear()
+            reload_ms = (time.perf_counter() - start) * 1000
+            self.metrics.increment("knn_service.reloads")
+            self.metrics.observe("knn_service.reload_ms", reload_ms)
+            return reload_ms
+        finally:
+            self._reload_lock.release()
+
+    def _to_wifi_dict(self, request: EstimatePositionRequest):
+        # Convertir lista de WifiMeasurement a diccionario {mac_bssid: rssi}
+        sorted_measurements = sorted(request.wifi_measurements, key=lambda measurement: measurement.mac_bssid)
+        return {measurement.mac_bssid: measurement.rssi for measurement in sorted_measurements}
+
+    def estimate_2d_floor_batch(self, requests: List[EstimatePositionRequest]):
+        # Recibe una lista de EstimatePositionRequest y devuelve latitud, longitud y floorId de cada una.
+        wifi_dicts = [self._to_wifi_dict(request) for request in requests]
+        if not wifi_dicts:
+            return []
+
+        if self.cache is None:
+            # Referencia local: una recarga concurrente no afecta a esta petición
+            models = self.models
+            return models.estimate(wifi_dicts)
+
+        # La generación se lee antes que los modelos para no guardar resultados de modelos ya sustituidos
+        generation = self.cache.generation
+        models = self.models
+
+        keys = [self.cache.key(wifi_dict) for wifi_dict in wifi_dicts]
+        results = [self.cache.get(key) for key in keys]
+
+        # Solo se estiman los escaneos que no están en caché
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            estimations = models.estimate([wifi_dicts[i] for i in misses])
+            for i, estimation in zip(misses, estimations):
+                self.cache.put(keys[i], estimation, generation)
+                results[i] = estimation
+
+        return results
+
+    def estimate_2d_floor(self, request: EstimatePositionRequest):
+        # Recibe un EstimatePositionRequest y devuelve latitud, longitud y floorId.
+        return self.estimate_2d_floor_batch([request])[0]
@@ -0,0 +1,61 @@
+import threading
+import numpy as np
+from collections import deque
+
+class MetricsService:
+    # Número de observaciones recientes que se guardan para calcular percentiles
+    WINDOW_SIZE = 1024
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._counters = {}
+            cls._instance._gauges = {}
+            cls._instance._summaries = {}
+        return cls._instance
+
+    def increment(self, name, value=1):
+        # Incrementa un contador
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        # Fija el valor actual de una magnitud (tamaño de cola, elementos en caché...)
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        # Registra una observación (tamaño, latencia...) en un resumen
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = {"count": 0, "sum": 0.0, "max": float("-inf"), "window": deque(maxlen=self.WINDOW_SIZE)}
+                self._summaries[name] = summary
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+            summary["window"].append(value)
+
+    def snapshot(self):
+        # Devuelve el estado actual de contadores y resúmenes
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            summaries = {name: (summary["count"], summary["sum"], summary["max"], list(summary["window"]))
+                         for name, summary in self._summaries.items()}
+
+        result = {"counters": counters, "gauges": gauges, "summaries": {}}
+        for name, (count, total, maximum, window) in summaries.items():
+            p50, p95, p99 = np.percentile(window, [50, 95, 99])
+            result["summaries"][name] = {
+                "count": count,
+                "mean": total / count,
+                "max": maximum,
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99)
+            }
+        return result
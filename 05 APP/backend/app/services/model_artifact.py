@@ -0,0 +1,55 @@
+import json
+import os
+import numpy as np
+from services.fingerprint_encoder import FingerprintEncoder
+from services.knn_engine import KNNRegressor, KNNClassifier, build_neighbors
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+class ModelArtifact:
+    # Modelo KNN en formato plano generado por Trainer.save_flat_model_to_disk:
+    # manifest.json (columnas y parámetros) y arrays .npy abiertos con np.load(mmap_mode='r'),
+    # de modo que todos los workers comparten la misma copia en la caché de páginas.
+
+    def __init__(self, folder):
+        self.folder = folder
+        with open(os.path.join(folder, MANIFEST_FILE_NAME), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+    @staticmethod
+    def exists(folder):
+        # Indica si la carpeta contiene un modelo en formato plano
+        return os.path.isfile(os.path.join(folder, MANIFEST_FILE_NAME))
+
+    def _array(self, name):
+        return np.load(os.path.join(self.folder, f"{name}.npy"), mmap_mode="r")
+
+    def encoder(self):
+        # Codificador con las columnas y estadísticas del scaler del manifiesto
+        mean = self._array("scaler_mean") if self.manifest["with_mean"] else None
+        scale = self._array("scaler_scale") if self.manifest["with_std"] else None
+        return FingerprintEncoder(self.manifest["columns"], mean, scale)
+
+    def _neighbors(self, baseline, backend, dtype):
+        # La matriz float32 ya guardada evita una copia privada al usar el motor 'brute_force'
+        if backend == "brute_force" and np.dtype(dtype) == np.float32:
+            fit_X = self._array("fit_X_float32")
+        else:
+            fit_X = self._array("fit_X")
+        return build_neighbors(fit_X, baseline, backend, dtype, self.manifest["metric"])
+
+    def model(self, baseline, backend, dtype):
+        # KNNRegressor o KNNClassifier sobre el buscador de vecinos configurado
+        neighbors = self._neighbors(baseline, backend, dtype)
+        if self.manifest["type"] == "classifier":
+            return KNNClassifier(neighbors, self._array("y"), self.manifest["n_neighbors"], self.manifest["weights"])
+        return KNNRegressor(neighbors, self._array("y"), self.manifest["n_neighbors"], self.manifest["weights"])
+
+    def joint_model(self, baseline, backend, dtype):
+        # Buscador compartido y modelos de regresión 2D y planta del modelo conjunto
+        neighbors = self._neighbors(baseline, backend, dtype)
+        knn_2d = KNNRegressor(neighbors, self._array("positions"), self.manifest["n_neighbors_2d"],
+                              self.manifest.get("weights_2d", "uniform"))
+        knn_floor = KNNClassifier(neighbors, self._array("floors"), self.manifest["n_neighbors_floor"],
+                                  self.manifest.get("weights_floor", "uniform"))
+        return neighbors, knn_2d, knn_floor
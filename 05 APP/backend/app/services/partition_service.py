@@ -0,0 +1,67 @@
+import asyncio
+import time
+from datetime import timedelta
+from config.config import Config
+from repositories.database_repo import Database
+from services.date_service import DateService
+from services.executor_service import ExecutorService
+from services.metrics_service import MetricsService
+
+class PartitionService:
+    # Mantenimiento de las particiones diarias de UserPosition y UserWifi: crea las de los próximos
+    # premake_days días y, solo si se configura retention_days > 0, borra las que lo superan.
+    # Por defecto (0) se conserva todo el histórico, que se usa también para análisis
+    config = Config()
+
+    def __init__(self):
+        partitioning_conf = self.config.partitioning
+        self.premake_days = partitioning_conf.get("premake_days", 3)
+        self.retention_days = partitioning_conf.get("retention_days", 0)
+        self.interval = partitioning_conf.get("maintenance_interval_minutes", 60) * 60
+        self.db = Database()
+        self.date_service = DateService()
+        self.executor = ExecutorService()
+        self.metrics = MetricsService()
+        self._task = None
+
+    def maintain(self):
+        # Crea las particiones que falten desde hoy (UTC) y borra las caducadas
+        today = self.date_service.get_current_date_utc().date()
+        days = [today + timedelta(days=i) for i in range(self.premake_days + 1)]
+        oldest_day = today - timedelta(days=self.retention_days) if self.retention_days else None
+
+        start = time.perf_counter()
+        created, dropped = self.db.maintain_partitions(days, oldest_day)
+        self.metrics.observe("partitions.maintenance_ms", (time.perf_counter() - start) * 1000)
+        self.metrics.increment("partitions.created", len(created))
+        self.metrics.increment("partitions.dropped", len(dropped))
+        return created, dropped
+
+    async def _maintain(self):
+        try:
+            await self.executor.run_io(self.maintain)
+        except Exception as e:
+            # Sin las particiones del día las filas van a la partición por defecto hasta el siguiente mantenimiento
+            print(f"Partition maintenance failed: {e}")
+            self.metrics.increment("partitions.maintenance_failures")
+
+    async def start(self):
+        # Primer mantenimiento antes de aceptar peticiones (para no usar la partición por defecto)
+        # y después periódicamente en segundo plano
+        await self._maintain()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._maintain()
+
+    async def stop(self):
+        # Detiene la tarea periódica
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from config.config import Config
+from services.metrics_service import MetricsService
+
+class PositionBroadcaster:
+    # Difunde a los clientes conectados al stream (Server-Sent Events) las posiciones que se guardan.
+    # Cada mensaje se serializa una vez y se reparte a una cola acotada por cliente: si un cliente
+    # lento llena su cola se vacía y se le envía de nuevo la foto completa (resync).
+    config = Config()
+
+    # Marcas que se encolan en lugar de un mensaje
+    RESYNC = "resync"
+    CLOSE = "close"
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.max_queue_size = cls.config.position_stream.get("max_queue_size", 100)
+            cls._instance.metrics = MetricsService()
+            cls._instance._clients = set()
+        return cls._instance
+
+    def subscribe(self):
+        # Registra un cliente y devuelve su cola de mensajes
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._clients.add(queue)
+        self.metrics.set_gauge("position_broadcaster.clients", len(self._clients))
+        return queue
+
+    def unsubscribe(self, queue):
+        self._clients.discard(queue)
+        self.metrics.set_gauge("position_broadcaster.clients", len(self._clients))
+
+    def _event(self, event, data):
+        # Mensaje SSE: tipo de evento y datos JSON en una línea
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def _send(self, message):
+        # Encola el mensaje en todos los clientes sin esperar a ninguno
+        for queue in self._clients:
+            if queue.full():
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.RESYNC)
+                self.metrics.increment("position_broadcaster.resyncs")
+            else:
+                queue.put_nowait(message)
+
+    def snapshot_event(self, system_timestamp, users):
+        # Foto completa de las últimas posiciones (al conectar y tras un resync)
+        return self._event("snapshot", {"systemTimestamp": system_timestamp, "users": users})
+
+    def publish_positions(self, system_timestamp, users):
+        # Posiciones nuevas de una o varias personas
+        if self._clients and users:
+            self._send(self._event("positions", {"systemTimestamp": system_timestamp, "users": users}))
+
+    def publish_clear(self, system_timestamp):
+        # Se han borrado todas las posiciones
+        if self._clients:
+            self._send(self._event("clear", {"systemTimestamp": system_timestamp}))
+
+    def keepalive_event(self):
+        # Comentario SSE para que proxies y navegador no cierren la conexión inactiva
+        return ": keepalive\n\n"
+
+    def close(self):
+        # Termina los streams abiertos al parar el servicio
+        for queue in self._clients:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.CLOSE)
\ No newline at end of file
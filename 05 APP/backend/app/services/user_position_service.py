@@ -1,20 +1,71 @@
+from zoneinfo import ZoneInfo
 from repositories.database_repo import Database
+from repositories.async_database_repo import AsyncDatabase
+from services.executor_service import ExecutorService
+from services.position_broadcaster import PositionBroadcaster
+from services.date_service import DateService
+from config.config import Config
 
 class UserPositionService:
+    config = Config()
 
     def __init__(self):
-        # Inicializa Database
-        self.db = Database()
+        # Inicializa Database: síncrona por defecto, ejecutada en el pool de hilos de E/S.
+        # La asíncrona (database.async) no funciona con el bucle Proactor que usa uvicorn en Windows
+        self.use_async = self.config.database.get("async", False)
+        self.db = AsyncDatabase() if self.use_async else Database()
+        self.executor_service = ExecutorService()
+        self.broadcaster = PositionBroadcaster()
+        self.date_service = DateService()
+        self.current_timezone = ZoneInfo(self.config.timezone)
 
-    def get_users_positions(self):
+    async def _call(self, method_name, *args):
+        # Espera la llamada asíncrona o lanza la síncrona en el pool de E/S
+        if self.use_async:
+            return await getattr(self.db, method_name)(*args)
+        return await self.executor_service.run_io(getattr(self.db, method_name), *args)
+
+    def _current_timestamp(self):
+        return self.date_service.get_current_date_utc().astimezone(self.current_timezone).isoformat()
+
+    def _publish(self, users_info, user_ids):
+        # Envía al stream las posiciones ya guardadas, con los mismos campos que get_users_positions
+        if user_ids is None:
+            return
+        self.broadcaster.publish_positions(self._current_timestamp(), [
+            {
+                "userId": user_ids[position["device_name"]],
+                "deviceName": position["device_name"],
+                "lastUpdateTimestamp": position["currentTimestamp"].astimezone(self.current_timezone).isoformat(),
+                "latitude": position["latitude"],
+                "longitude": position["longitude"],
+                "floorId": position["floorId"]
+            }
+            for position, _ in users_info
+        ])
+
+    async def get_users_positions(self):
         # Llamada a Database.get_users_positions()
-        return self.db.get_users_positions()
-        
-    def update_user_info(self,data,wifi_measurements):
-        # Llamada a Database.update_user_info()
-        self.db.update_user_info(data,wifi_measurements)
+        return await self._call("get_users_positions")
         
-    def clear_users_positions(self):
+    async def get_users_positions_since(self,since=None):
+        # Llamada a Database.get_users_positions_since()
+        return await self._call("get_users_positions_since", since)
+
+    async def update_user_info(self,data,wifi_measurements):
+        # Llamada a Database.update_users_info()
+        await self.update_users_info([(data, wifi_measurements)])
+
+    async def update_users_info(self,users_info):
+        # Llamada a Database.update_users_info()
+        self._publish(users_info, await self._call("update_users_info", users_info))
+
+    async def copy_users_info(self,users_info):
+        # Llamada a Database.copy_users_info()
+        self._publish(users_info, await self._call("copy_users_info", users_info))
+
+    async def clear_users_positions(self):
         # Llamada a Database.clear_users_positions()
-        self.db.clear_users_positions()
+        await self._call("clear_users_positions")
+        self.broadcaster.publish_clear(self._current_timestamp())
         
\ No newline at end of file
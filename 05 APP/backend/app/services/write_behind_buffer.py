@@ -0,0 +1,100 @@
+import asyncio
+import time
+from services.metrics_service import MetricsService
+
+class WriteBehindBuffer:
+    # Escritura diferida del histórico de posiciones y mediciones WIFI: las peticiones se confirman
+    # al encolar y una tarea en segundo plano carga los lotes con COPY cada max_batch_size filas
+    # o cada flush_interval_ms. Cada escaneo encolado son 1 fila de UserPosition más una de UserWifi
+    # por medición. La cola está acotada en escaneos: si se llena, las peticiones esperan.
+
+    def __init__(self, user_position_service, max_batch_size=5000, flush_interval_ms=200, max_queue_size=10000):
+        self.user_position_service = user_position_service
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.metrics = MetricsService()
+        self._queue = None
+        self._task = None
+
+    def _start(self):
+        # Arranca la tarea de volcado en el bucle de eventos actual
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def add(self, position, wifi_measurements):
+        # Encola la información de una persona; se copia la posición porque quien llama la sigue modificando
+        if self._task is None or self._task.done():
+            self._start()
+
+        await self._queue.put((dict(position), wifi_measurements))
+        self.metrics.set_gauge("write_behind.queue_depth", self._queue.qsize())
+
+    async def add_many(self, users_info):
+        # Encola la información de varias personas. users_info es una lista de tuplas (position, wifi_measurements)
+        for position, wifi_measurements in users_info:
+            await self.add(position, wifi_measurements)
+
+    def _rows(self, batch):
+        # Filas que se insertan para un lote de escaneos
+        return sum(1 + len(wifi_measurements) for _, wifi_measurements in batch)
+
+    async def _collect_batch(self):
+        # Espera el primer escaneo y agrupa los siguientes hasta llenar el lote o agotar el intervalo.
+        # Devuelve el lote y si se ha recibido la marca de fin (None) que encola stop()
+        item = await self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        rows = self._rows(batch)
+        deadline = time.perf_counter() + self.flush_interval
+
+        while rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            rows += 1 + len(item[1])
+
+        return batch, False
+
+    async def _flush(self, batch):
+        # Carga un lote con COPY; si falla se descarta para no acumular memoria
+        start = time.perf_counter()
+        rows = self._rows(batch)
+        try:
+            await self.user_position_service.copy_users_info(batch)
+            self.metrics.increment("write_behind.flushed_scans", len(batch))
+            self.metrics.increment("write_behind.flushed_rows", rows)
+        except Exception as e:
+            print(f"Write-behind batch dropped ({len(batch)} scans, {rows} rows): {e}")
+            self.metrics.increment("write_behind.flush_failures")
+            self.metrics.increment("write_behind.dropped_scans", len(batch))
+            self.metrics.increment("write_behind.dropped_rows", rows)
+        finally:
+            self.metrics.observe("write_behind.flush_ms", (time.perf_counter() - start) * 1000)
+            self.metrics.observe("write_behind.batch_size", rows)
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect_batch()
+            self.metrics.set_gauge("write_behind.queue_depth", self._queue.qsize())
+            if batch:
+                await self._flush(batch)
+
+    async def stop(self):
+        # Encola la marca de fin y espera a que se vuelque todo lo pendiente antes de cerrar las conexiones.
+        # No se cancela la tarea para no interrumpir un COPY a medias.
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(None)
+                await self._task
+            self._task = None
+        self.metrics.set_gauge("write_behind.queue_depth", 0)
\ No newline at end of file
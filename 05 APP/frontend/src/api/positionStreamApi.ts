@@ -0,0 +1,144 @@
+import {UserPositionServiceConfig} from "../core/appConfig";
+import {UsersPositions, UserPosition} from "../model/userPositionsModels"
+
+/**
+ * Servicio que recibe del backend (Server-Sent Events) las posiciones de las personas
+ * según se guardan y notifica periódicamente la lista completa mediante un callback,
+ * con la misma forma que PositionUpdater pero sin consultar el servicio en cada intervalo.
+ * @class PositionStream
+ */
+export class PositionStream {
+    /**
+     * Identificador del intervalo activo.
+     * @private
+     */
+    private intervalId: number | null = null;
+
+    /**
+     * Conexión con el stream de posiciones.
+     * @private
+     */
+    private eventSource: EventSource | null = null;
+
+    /**
+     * URL del stream de posiciones.
+     * @private
+     */
+    private streamUsersPositionsUrl: string;
+
+    /**
+     * Última posición conocida de cada persona por identificador.
+     * @private
+     */
+    private users: Map<number, UserPosition> = new Map();
+
+    /**
+     * Diferencia en milisegundos entre la hora del servidor y la del navegador.
+     * @private
+     */
+    private serverOffset: number = 0;
+
+    /**
+     * Función de callback que se ejecutará cada vez que se actualizan las posiciones.
+     * @private
+     */
+    private callback: (usersPositions: UsersPositions) => void;
+
+    /**
+     * Crea una nueva instancia de PositionStream.
+     * @constructor
+     * @param {UserPositionServiceConfig} serviceConfig - Configuración del servicio de posiciones.
+     * @param {(usersPositions: UsersPositions) => void} callback - Función de callback que se ejecutará cada vez que se actualizan las posiciones.
+     */
+    constructor(serviceConfig: UserPositionServiceConfig, callback: (usersPositions: UsersPositions) => void) {
+        this.streamUsersPositionsUrl = serviceConfig.streamUsersPositionsUrl!;
+        this.callback = callback;
+    }
+
+    /**
+    * Abre el stream y notifica las posiciones periódicamente.
+    * EventSource se reconecta solo si se pierde la conexión y el servidor envía de nuevo la foto completa.
+    * @param {number} [intervalMilliseconds=1000] - Intervalo en milisegundos entre notificaciones.
+    */
+    start(intervalMilliseconds: number = 1000) {
+        if (this.intervalId) return;
+
+        this.eventSource = new EventSource(this.streamUsersPositionsUrl);
+        this.eventSource.addEventListener("snapshot", (event) => {
+            const data = this.parse(event as MessageEvent);
+            this.users.clear();
+            this.mergeUsers(data.users);
+            this.notify();
+        });
+        this.eventSource.addEventListener("positions", (event) => {
+            this.mergeUsers(this.parse(event as MessageEvent).users);
+        });
+        this.eventSource.addEventListener("clear", (event) => {
+            this.parse(event as MessageEvent);
+            this.users.clear();
+            this.notify();
+        });
+        this.eventSource.onerror = (err) => {
+            console.error("Error in user positions stream:", err);
+        };
+
+        this.intervalId = window.setInterval(() => {
+            this.notify();
+        }, intervalMilliseconds);
+    }
+
+    /**
+    * Cierra el stream y detiene las notificaciones.
+    */
+    stop() {
+        if (this.intervalId) {
+            clearInterval(this.intervalId);
+            this.intervalId = null;
+        }
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+
+    /**
+     * Parsea un mensaje del stream y actualiza la diferencia con la hora del servidor.
+     * @private
+     * @param {MessageEvent} event - Mensaje recibido.
+     * @returns {UsersPositions} Datos del mensaje.
+     */
+    private parse(event: MessageEvent): UsersPositions {
+        const data = JSON.parse(event.data) as UsersPositions;
+        this.serverOffset = new Date(data.systemTimestamp).getTime() - Date.now();
+        return data;
+    }
+
+    /**
+     * Guarda las posiciones recibidas, conservando la más reciente de cada persona.
+     * @private
+     * @param {UserPosition[]} users - Posiciones recibidas.
+     */
+    private mergeUsers(users: UserPosition[]) {
+        users.forEach(user => {
+            const current = this.users.get(user.userId);
+            if (!current || new Date(current.lastUpdateTimestamp).getTime() <= new Date(user.lastUpdateTimestamp).getTime()) {
+                this.users.set(user.userId, user);
+            }
+        });
+    }
+
+    /**
+     * Llama al callback con todas las posiciones y el tiempo transcurrido desde su última actualización.
+     * @private
+     */
+    private notify() {
+        const systemTimestamp = Date.now() + this.serverOffset;
+        const users = Array.from(this.users.values())
+            .sort((a, b) => a.userId - b.userId)
+            .map(user => ({
+                ...user,
+                lastUpdateInSeconds: (systemTimestamp - new Date(user.lastUpdateTimestamp).getTime()) / 1000
+            }));
+        this.callback({systemTimestamp: systemTimestamp, users: users});
+    }
+}
\ No newline at end of file
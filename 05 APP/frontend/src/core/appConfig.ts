@@ -41,11 +41,13 @@ export interface MapConfig {
  * Configuración del servicio que obtiene las posiciones de las personas.
  * @typedef {Object} UserPositionServiceConfig
  * @property {string} getUsersPositionsUrl - URL del servicio.
+ * @property {string} [streamUsersPositionsUrl] - URL del stream de posiciones (si se indica, se usa en lugar de consultar el servicio).
  * @property {number} updateInterval - Intervalo de actualización (ms).
  * @property {number} maxUpdateElapsedTime - Umbral para lanzar la alerta.
  */
 export interface UserPositionServiceConfig {
     getUsersPositionsUrl: string;
+    streamUsersPositionsUrl?: string;
     updateInterval: number;
     maxUpdateElapsedTime: number;
 }
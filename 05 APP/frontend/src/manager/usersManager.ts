@@ -1,4 +1,5 @@
 import {PositionUpdater} from "../api/positionUpdaterApi"
+import {PositionStream} from "../api/positionStreamApi"
 import {UserPositionServiceConfig} from "../core/appConfig";
 import {UsersPositions, UserPosition} from "../model/userPositionsModels";
 import {managers} from "./managers"
@@ -11,10 +12,10 @@ import {managers} from "./managers"
 export class UsersManager {
 
     /**
-     * Servicio de actualización de posiciones.
+     * Servicio de actualización de posiciones (stream si está configurado, consultas periódicas si no).
      * @private
      */
-    private positionUpdater: PositionUpdater; 
+    private positionUpdater: PositionUpdater | PositionStream; 
     /**
      * Configuración del servicio de obtención de posiciones
      * @private
@@ -31,9 +32,12 @@ export class UsersManager {
     constructor(serviceConfig: UserPositionServiceConfig) {
         this.serviceConfig = serviceConfig;
         
-         this.positionUpdater = new PositionUpdater(this.serviceConfig, (usersPositions: UsersPositions) => {
+        const callback = (usersPositions: UsersPositions) => {
             managers.usersUpdated(usersPositions);
-        });
+        };
+        this.positionUpdater = this.serviceConfig.streamUsersPositionsUrl
+            ? new PositionStream(this.serviceConfig, callback)
+            : new PositionUpdater(this.serviceConfig, callback);
     }
 
     /**
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+import httpx
+
+# Mide el rendimiento del backend con distintos niveles de concurrencia.
+# Ejecutar contra el servicio antes y después de un cambio y comparar las tablas.
+# Para medir el rendimiento de un único proceso arrancar el backend con: uvicorn main:app --workers 1
+DATA_DIR = Path("./data")
+BASE_URL = "http://localhost:8000"
+ESTIMATE_POSITION_PATH = "/estimator/estimate-position"
+USER_POSITIONS_PATH = "/users/user-positions"
+METRICS_PATH = "/metrics/"
+
+def load_payloads():
+    # Carga todas las mediciones WIFI de los ficheros de usuarios como peticiones
+    payloads = []
+    for file_path in sorted(DATA_DIR.glob("*.json")):
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for t in sorted(data.keys(), key=float):
+            payloads.append({"device_name": file_path.stem, "wifi_measurements": data[t]})
+    return payloads
+
+async def worker(client, path, payloads, queue, latencies, errors):
+    while True:
+        try:
+            index = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            if path == ESTIMATE_POSITION_PATH:
+                resp = await client.post(path, json=payloads[index % len(payloads)])
+            else:
+                resp = await client.get(path)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors.append(index)
+
+async def run_level(client, path, payloads, concurrency, total_requests):
+    # Lanza total_requests peticiones con 'concurrency' clientes simultáneos
+    queue = asyncio.Queue()
+    for index in range(total_requests):
+        queue.put_nowait(index)
+
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, path, payloads, queue, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+    print(f"{concurrency:>11} | {len(latencies) / elapsed:>10.1f} | {p50:>8.1f} | {p95:>8.1f} | {len(errors):>6}")
+
+async def print_database_metrics(client):
+    # Tiempos de espera por una conexión del pool de base de datos según el backend
+    resp = await client.get(METRICS_PATH)
+    resp.raise_for_status()
+    for name, summary in sorted(resp.json()["summaries"].items()):
+        if name.startswith("database."):
+            print(f"{name}: count={summary['count']} p50={summary['p50']:.1f} ms p95={summary['p95']:.1f} ms max={summary['max']:.1f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de peticiones concurrentes")
+    parser.add_argument("--endpoint", choices=["estimate", "positions"], default="estimate")
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por nivel de concurrencia")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--database-metrics", action="store_true", help="Muestra las métricas del pool de base de datos al terminar")
+    args = parser.parse_args()
+
+    path = ESTIMATE_POSITION_PATH if args.endpoint == "estimate" else USER_POSITIONS_PATH
+    payloads = load_payloads()
+
+    print(f"Endpoint: {path}, {args.requests} requests per level")
+    print("concurrency |      req/s | p50 (ms) | p95 (ms) | errors")
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        for concurrency in args.concurrency:
+            await run_level(client, path, payloads, concurrency, args.requests)
+        if args.database_metrics:
+            await print_database_metrics(client)
+
+if __name__ == "__main__":
+    asyncio.run(main())